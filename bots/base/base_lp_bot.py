@@ -3,9 +3,8 @@ import logging
 import traceback
 import uuid
 from abc import ABC, abstractmethod
-from collections import deque
-from datetime import datetime
 from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
 
 import discord
 from aiohttp import web
@@ -14,9 +13,15 @@ from discord import app_commands
 from bots.base.bot_config import BotConfig
 from bots.base.database.wallet_manager import WalletManager
 from bots.base.database.wallet_manager import WalletStorage
+from bots.base.webhook_cache import WebhookCache
 from bots.base.webhook_manager import WebhookManager, TransactionProcessor
 from config.constants import LPCONNECT
 from libs.helius.helius_webhook_api import HeliusWebhookAPI
+from libs.helius.helius_webhook_parser import helius_webhook_account_keys
+from libs.solana.account_cache import get_account_cache
+from libs.solana.mint_info_cache import MintInfoCache, set_mint_info_cache
+from libs.solana.rpc_pool import get_rpc_client, close_rpc_clients
+from libs.utils.render_pool import get_render_pool, close_render_pool
 
 logger = logging.getLogger(LPCONNECT)
 
@@ -24,73 +29,84 @@ logger = logging.getLogger(LPCONNECT)
 async def _webhook_shutdown(app):
     """Shutdown handler for the web application"""
     await app['webhook_manager'].stop()
+    await app['webhook_cache'].close()
+    await close_rpc_clients()
+    await close_render_pool()
 
 
 async def _webhook_startup(app):
     """Startup handler for the web application"""
+    await app['webhook_cache'].initialize()
     await app['webhook_manager'].start()
-    app['webhook_cache'] = WebhookCache()
 
 
 async def _health_check(request: web.Request) -> web.Response:
     """Health check endpoint"""
     status = request.app['webhook_manager'].get_status()
+    status['webhook_cache'] = request.app['webhook_cache'].get_stats()
+    status['account_cache'] = get_account_cache().get_stats()
+    status['render_pool'] = get_render_pool().get_stats()
     return web.json_response(status)
 
 
-class WebhookCache:
+def _get_transaction_id(transaction: Dict[str, Any]) -> Optional[str]:
+    """Extract the transaction signature used for duplicate detection"""
+    signatures = transaction.get('transaction', {}).get('signatures') or [None]
+    return signatures[0]
+
+
+async def _filter_duplicates(webhook_cache: WebhookCache,
+                             transactions: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Set[str]]:
     """
-    Simple memory-based cache to track recently processed webhooks.
-    Used to detect and filter out duplicate webhook deliveries from Helius,
-    which implements at-least-once delivery guarantee and may send the same webhook multiple times.
+    Drop transactions that were already delivered, including repeats inside the same batch.
+    Returns the novel transactions and their ids, ids are recorded only once the batch is accepted.
     """
-    def __init__(self, maxsize=1000, ttl_seconds=60):
-        """
-        Initialize webhook cache with size and time limits.
-        """
-        self.cache = deque(maxlen=maxsize)
-        self.ttl = ttl_seconds
-        self.lock = asyncio.Lock()
-
-    async def add(self, transaction_id: str) -> None:
-        """
-        Add new transaction to cache with current timestamp.
-        Oldest entries are automatically removed when maxsize is reached.
-        """
-        async with self.lock:
-            self.cache.append((transaction_id, datetime.now()))
-
-    async def exists(self, transaction_id: str) -> bool:
-        """
-        Check if transaction was recently processed.
-        Automatically cleans expired entries based on TTL.
-        """
-        async with self.lock:
-            # Clean old entries
-            now = datetime.now()
-            while self.cache and (now - self.cache[0][1]).seconds > self.ttl:
-                self.cache.popleft()
-
-            return any(tx_id == transaction_id for tx_id, _ in self.cache)
+    novel_transactions = []
+    novel_ids = set()
+    for transaction in transactions:
+        tx_id = _get_transaction_id(transaction)
+        if tx_id is not None:
+            if tx_id in novel_ids or await webhook_cache.exists(tx_id):
+                continue
+            novel_ids.add(tx_id)
+        novel_transactions.append(transaction)
+    return novel_transactions, novel_ids
+
+
+def _invalidate_touched_accounts(transactions: List[Dict[str, Any]]) -> None:
+    """Drop cached accounts that the webhook transactions may have modified"""
+    account_cache = get_account_cache()
+    for transaction in transactions:
+        if isinstance(transaction, dict):
+            account_cache.invalidate(helius_webhook_account_keys(transaction), transaction.get('slot') or 0)
+
 
 async def _webhook_handler(request: web.Request) -> web.Response:
     """Handle incoming webhook requests"""
     request_id = str(uuid.uuid4())[:8]
     try:
         content = await request.json()
+        transactions = content if isinstance(content, list) else [content]
 
-        # Extract transaction ID for duplicate detection
-        if isinstance(content, list):
-            tx_id = content[0].get('transaction', {}).get('signatures', ['N/A'])[0]
-        else:
-            tx_id = content.get('transaction', {}).get('signatures', ['N/A'])[0]
-
-        if tx_id != 'N/A' and await request.app['webhook_cache'].exists(tx_id):
-            logger.info(f"[{request_id}] Duplicate webhook detected, skipping: {tx_id}")
+        webhook_cache = request.app['webhook_cache']
+        novel_transactions, novel_ids = await _filter_duplicates(webhook_cache, transactions)
+        duplicates = len(transactions) - len(novel_transactions)
+        if not novel_transactions:
+            logger.info(f"[{request_id}] Duplicate webhook detected, skipping {duplicates} transactions")
             return web.Response(status=202)  # Acknowledge receipt to prevent retries
+        if duplicates:
+            logger.info(f"[{request_id}] Skipping {duplicates} duplicate transactions out of {len(transactions)}")
+
+        _invalidate_touched_accounts(novel_transactions)
 
-        await request.app['webhook_cache'].add(tx_id)
-        asyncio.create_task(request.app['webhook_manager'].add_webhook(content))
+        webhook_manager = request.app['webhook_manager']
+        if not await webhook_manager.add_webhook(novel_transactions):
+            retry_after = webhook_manager.get_retry_after()
+            logger.warning(f"[{request_id}] Webhook queue saturated, asking to retry after {retry_after}s")
+            return web.Response(status=503, headers={'Retry-After': str(retry_after)})
+
+        for tx_id in novel_ids:
+            await webhook_cache.add(tx_id)
 
         logger.info(f"[{request_id}] Webhook accepted for processing")
         return web.Response(status=202)
@@ -99,6 +115,7 @@ async def _webhook_handler(request: web.Request) -> web.Response:
         logger.error(f"[{request_id}] Traceback: {traceback.format_exc()}")
         return web.Response(status=500)
 
+
 def _setup_discord_client() -> discord.Client:
     """Initialize the Discord client"""
     intents = discord.Intents.default()
@@ -115,7 +132,14 @@ class BaseLPBot(ABC):
         storage_dir = Path(config.storage_dir)
         storage_dir.mkdir(exist_ok=True, parents=True)
         self.wallet_storage = WalletStorage(storage_dir / "wallets.msgpack")
+        self.mint_info_cache = MintInfoCache(storage_dir / "mint_info.msgpack",
+                                             metadata_ttl_seconds=config.token_metadata_refresh_seconds or None)
+        set_mint_info_cache(self.mint_info_cache)
         self.webhook_api = HeliusWebhookAPI(config.helius_api_key)
+        self.solana_client = get_rpc_client(config.solana_rpc,
+                                            config.solana_rpc_max_connections,
+                                            config.solana_rpc_requests_per_second,
+                                            config.solana_rpc_max_batch_size)
         self.wallet_manager = WalletManager(
             self.webhook_api,
             self.wallet_storage,
@@ -147,6 +171,7 @@ class BaseLPBot(ABC):
     async def start(self):
         """Start the bot and all its components"""
         # Initialize storages
+        await self.mint_info_cache.initialize()
         discord_task = asyncio.create_task(self._start_discord_bot())
 
         # Wait for Discord to be ready before setting up services
@@ -179,6 +204,7 @@ class BaseLPBot(ABC):
         """Run the webhook server"""
         app = web.Application()
         app['webhook_manager'] = WebhookManager(transaction_processor)
+        app['webhook_cache'] = WebhookCache(Path(self.config.storage_dir) / "webhook_cache.msgpack")
 
         app.router.add_post('/', _webhook_handler)
         app.router.add_get('/health', _health_check)
@@ -16,6 +16,10 @@ class BotConfig:
     helius_api_key: str
     helius_webhook_id: str
     storage_dir: str
+    solana_rpc_max_connections: int
+    solana_rpc_requests_per_second: float
+    solana_rpc_max_batch_size: int
+    token_metadata_refresh_seconds: int
 
     @classmethod
     def from_env(cls, dotenv_path: str) -> Self:
@@ -30,6 +34,10 @@ class BotConfig:
         helius_api_key = os.getenv('HELIUS_API_KEY')
         helius_webhook_id = os.getenv('HELIUS_WEBHOOK_ID')
         storage_dir = os.getenv('STORAGE_DIR')
+        solana_rpc_max_connections = int(os.getenv('SOLANA_RPC_MAX_CONNECTIONS', 20))
+        solana_rpc_requests_per_second = float(os.getenv('SOLANA_RPC_REQUESTS_PER_SECOND', 10))
+        solana_rpc_max_batch_size = int(os.getenv('SOLANA_RPC_MAX_BATCH_SIZE', 20))
+        token_metadata_refresh_seconds = int(os.getenv('TOKEN_METADATA_REFRESH_SECONDS', 7 * 24 * 3600))
         if not all([discord_token, channel_id, solana_rpc, helius_api_key, helius_webhook_id]):
             raise ValueError("Missing required environment variables")
 
@@ -42,4 +50,8 @@ class BotConfig:
             helius_api_key=helius_api_key,
             helius_webhook_id=helius_webhook_id,
             storage_dir=storage_dir,
+            solana_rpc_max_connections=solana_rpc_max_connections,
+            solana_rpc_requests_per_second=solana_rpc_requests_per_second,
+            solana_rpc_max_batch_size=solana_rpc_max_batch_size,
+            token_metadata_refresh_seconds=token_metadata_refresh_seconds,
         )
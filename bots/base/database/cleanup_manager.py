@@ -34,8 +34,9 @@ class CleanupManager:
             await thread.send(embed=summary_embed, file=csv_file)
         except Exception as e:
             logging.exception(f'Failed to generate vote summary {e}')
-        embed, table_image = create_session_close_embed(performance, token_x, token_y)
-        await thread.send(file=discord.File(table_image, filename="performance_table.png"), embed=embed)
+        embed, table_image = await create_session_close_embed(performance, token_x, token_y)
+        table_file = discord.File(table_image, filename="performance_table.png") if table_image else None
+        await thread.send(file=table_file, embed=embed)
         await thread.send("🌊 Session closed. Next wave awaits! 🌪️")
         if placeholder_message_id:
             try:
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Self
+
+from config.constants import LPCONNECT
+from libs.utils.base_storage import (
+    BaseStorage, StorageConfig, StorageError,
+    ValidationError, StorageOperationError, MsgPackable
+)
+
+logger = logging.getLogger(LPCONNECT)
+
+
+@dataclass(frozen=True, slots=True)
+class PendingClose:
+    tx: str
+    block_time: int
+    position: str
+    owner: str
+    is_anonymous: bool
+    due_time: float
+    slot: int = 0
+    attempts: int = 0  # failed attempts so far
+
+    @classmethod
+    def validate(cls, tx: str, position: str, owner: str) -> None:
+        """Validate pending close components"""
+        if not all(isinstance(x, str) for x in [tx, position, owner]):
+            raise ValidationError("All pending close components must be strings")
+        if not all(x.strip() for x in [tx, position, owner]):
+            raise ValidationError("All pending close components must be non-empty strings")
+
+    def to_dict(self) -> dict:
+        return {
+            'block_time': self.block_time,
+            'position': self.position,
+            'owner': self.owner,
+            'is_anonymous': self.is_anonymous,
+            'due_time': self.due_time,
+            'slot': self.slot,
+            'attempts': self.attempts
+        }
+
+    @classmethod
+    def from_dict(cls, tx: str, data: dict) -> Self:
+        return cls(
+            tx=tx,
+            block_time=data['block_time'],
+            position=data['position'],
+            owner=data['owner'],
+            is_anonymous=data['is_anonymous'],
+            due_time=data['due_time'],
+            slot=data.get('slot', 0),
+            attempts=data.get('attempts', 0)
+        )
+
+
+@dataclass
+class StorageState(MsgPackable):
+    """State container implementing MsgPackable protocol"""
+    VERSION: int = 1
+
+    version: int = VERSION
+    closes: Dict[str, PendingClose] = field(default_factory=dict)  # tx -> PendingClose
+
+    def to_msgpack(self) -> dict:
+        """Serialize to msgpack format"""
+        return {
+            'version': self.version,
+            'closes': {tx: pending.to_dict() for tx, pending in self.closes.items()}
+        }
+
+    @classmethod
+    def from_msgpack(cls, data: dict) -> Self:
+        try:
+            state = cls()
+            state.version = data.get('version', cls.VERSION)
+            for tx, pending in data.get('closes', {}).items():
+                state.closes[tx] = PendingClose.from_dict(tx, pending)
+            return state
+
+        except Exception as e:
+            raise StorageError(f"Failed to deserialize storage state: {e}")
+
+
+class PendingCloseStorage(BaseStorage[StorageState]):
+    """Storage of close position events that are scheduled but not processed yet"""
+
+    def __init__(self, file_path: str | Path,
+                 save_interval: float = 5.0,
+                 batch_size: int = 1,
+                 **kwargs):
+        config = StorageConfig(
+            file_path=Path(file_path),
+            save_interval=save_interval,
+            batch_size=batch_size,
+            **kwargs
+        )
+        super().__init__(config)
+
+    def create_empty_state(self) -> StorageState:
+        """Create an empty storage state"""
+        return StorageState()
+
+    def state_from_msgpack(self, data: dict) -> StorageState:
+        """Create state from msgpack data"""
+        return StorageState.from_msgpack(data)
+
+    async def add_pending_close(self, pending: PendingClose) -> None:
+        """Record a scheduled close, rescheduling replaces the previous due time"""
+        try:
+            PendingClose.validate(pending.tx, pending.position, pending.owner)
+            async with self._lock:
+                self.state.closes[pending.tx] = pending
+                self._mark_modified()
+
+        except Exception as e:
+            raise StorageOperationError(f"Failed to add pending close: {e}")
+
+    async def remove_pending_close(self, tx: str) -> bool:
+        """Remove a processed close"""
+        async with self._lock:
+            if self.state.closes.pop(tx, None) is not None:
+                self._mark_modified()
+                return True
+            return False
+
+    async def get_pending_closes(self) -> List[PendingClose]:
+        """Get all scheduled closes ordered by due time"""
+        return sorted(self.state.closes.values(), key=lambda pending: pending.due_time)
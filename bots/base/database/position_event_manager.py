@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Dict, List, Optional, Iterable, Self
+
+from config.constants import LPCONNECT
+from libs.meteora.idl.meteora_dllm.events.decoder import DLMMEvent, EventType, event_dataclasses
+from libs.utils.base_storage import (
+    BaseStorage, StorageConfig, StorageError, StorageOperationError, MsgPackable
+)
+
+logger = logging.getLogger(LPCONNECT)
+
+EVENT_TYPES_BY_CLASS = {event_class: event_type for event_type, event_class in event_dataclasses.items()}
+
+
+def event_to_list(event: DLMMEvent) -> list:
+    """Serialize an event without its transaction fields, as [event type, field values]"""
+    values = [getattr(event, field_info.name) for field_info in fields(event) if not field_info.kw_only][2:]
+    return [EVENT_TYPES_BY_CLASS[type(event)].value, values]
+
+
+def event_from_list(data: list, block_time: int, tx: str, slot: int) -> DLMMEvent:
+    event_type, values = data
+    return event_dataclasses[EventType(event_type)](block_time, tx, *values, slot=slot)
+
+
+@dataclass(slots=True)
+class LoggedTransaction:
+    slot: int
+    block_time: int
+    events: List[DLMMEvent] = field(default_factory=list)  # events of the position, in instruction order
+
+    def to_list(self) -> list:
+        return [self.slot, self.block_time, [event_to_list(event) for event in self.events]]
+
+    @classmethod
+    def from_list(cls, tx: str, data: list) -> Self:
+        slot, block_time, events = data
+        return cls(slot, block_time, [event_from_list(event, block_time, tx, slot) for event in events])
+
+
+@dataclass(slots=True)
+class PositionEventLog:
+    transactions: Dict[str, LoggedTransaction] = field(default_factory=dict)  # tx -> LoggedTransaction
+    synced_until: Optional[str] = None  # newest signature the log was checked against the RPC history up to
+
+    def get_events(self) -> List[DLMMEvent]:
+        """Get the events of every logged transaction in slot order"""
+        return [event for transaction in sorted(self.transactions.values(), key=lambda logged: logged.slot)
+                for event in transaction.events]
+
+    def to_dict(self) -> dict:
+        return {
+            'transactions': {tx: logged.to_list() for tx, logged in self.transactions.items()},
+            'synced_until': self.synced_until
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Self:
+        return cls(
+            transactions={tx: LoggedTransaction.from_list(tx, logged)
+                          for tx, logged in data.get('transactions', {}).items()},
+            synced_until=data.get('synced_until')
+        )
+
+
+@dataclass
+class StorageState(MsgPackable):
+    """State container implementing MsgPackable protocol"""
+    VERSION: int = 1
+
+    version: int = VERSION
+    positions: OrderedDict[str, PositionEventLog] = field(default_factory=OrderedDict)  # position -> log, LRU order
+
+    def to_msgpack(self) -> dict:
+        """Serialize to msgpack format"""
+        return {
+            'version': self.version,
+            'positions': [[position, log.to_dict()] for position, log in self.positions.items()]
+        }
+
+    @classmethod
+    def from_msgpack(cls, data: dict) -> Self:
+        try:
+            state = cls()
+            state.version = data.get('version', cls.VERSION)
+            for position, log in data.get('positions', []):
+                state.positions[position] = PositionEventLog.from_dict(log)
+            return state
+
+        except Exception as e:
+            raise StorageError(f"Failed to deserialize storage state: {e}")
+
+
+class PositionEventStorage(BaseStorage[StorageState]):
+    """
+    Append-only event log per open position, fed from the webhook stream, so the history of a position
+    does not have to be fetched again from the RPC node when it closes.
+    Logs of the least recently updated positions are dropped beyond max_positions.
+    """
+
+    def __init__(self, file_path: str | Path,
+                 max_positions: int = 5000,
+                 save_interval: float = 5.0,
+                 batch_size: int = 100,
+                 **kwargs):
+        config = StorageConfig(
+            file_path=Path(file_path),
+            save_interval=save_interval,
+            batch_size=batch_size,
+            **kwargs
+        )
+        super().__init__(config)
+        self.max_positions = max_positions
+
+    def create_empty_state(self) -> StorageState:
+        """Create an empty storage state"""
+        return StorageState()
+
+    def state_from_msgpack(self, data: dict) -> StorageState:
+        """Create state from msgpack data"""
+        return StorageState.from_msgpack(data)
+
+    def _get_or_create(self, position: str) -> PositionEventLog:
+        log = self.state.positions.get(position)
+        if log is None:
+            log = self.state.positions[position] = PositionEventLog()
+            while len(self.state.positions) > self.max_positions:
+                self.state.positions.popitem(last=False)
+        self.state.positions.move_to_end(position)
+        return log
+
+    async def record_events(self, events: Iterable[DLMMEvent]) -> None:
+        """Append the events of a transaction to the logs of the positions they belong to"""
+        try:
+            async with self._lock:
+                for event in events:
+                    position = getattr(event, 'position', None)
+                    if position is None:
+                        continue
+                    log = self._get_or_create(position)
+                    logged = log.transactions.get(event.tx)
+                    if logged is None:
+                        logged = log.transactions[event.tx] = LoggedTransaction(event.slot, event.block_time)
+                    if event not in logged.events:
+                        logged.events.append(event)
+                    self._mark_modified()
+
+        except Exception as e:
+            raise StorageOperationError(f"Failed to record events: {e}")
+
+    async def get_log(self, position: str) -> PositionEventLog:
+        """Get a copy of the event log of a position, empty when nothing was logged"""
+        log = self.state.positions.get(position)
+        if log is None:
+            return PositionEventLog()
+        return PositionEventLog(dict(log.transactions), log.synced_until)
+
+    async def add_synced_transactions(self, position: str, transactions: Dict[str, LoggedTransaction],
+                                      synced_until: Optional[str]) -> None:
+        """Merge transactions backfilled from the RPC node, and move the sync cursor to synced_until"""
+        async with self._lock:
+            log = self._get_or_create(position)
+            for tx, logged in transactions.items():
+                log.transactions.setdefault(tx, logged)
+            if synced_until is not None:
+                log.synced_until = synced_until
+            self._mark_modified()
+
+    async def remove_position(self, position: str) -> bool:
+        """Drop the log of a closed position"""
+        async with self._lock:
+            if self.state.positions.pop(position, None) is not None:
+                self._mark_modified()
+                return True
+            return False
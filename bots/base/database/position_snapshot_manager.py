@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Self
+
+import numpy as np
+
+from config.constants import LPCONNECT
+from libs.utils.base_storage import (
+    BaseStorage, StorageConfig, StorageError, StorageOperationError, MsgPackable
+)
+
+logger = logging.getLogger(LPCONNECT)
+
+
+@dataclass(slots=True)
+class PositionSnapshot:
+    """Bin amounts of a position at its last chart, as compact columns"""
+    bin_ids: np.ndarray  # int32
+    x_amounts: np.ndarray  # float64, in token units
+    y_amounts: np.ndarray  # float64, in token units
+    updated_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def from_columns(cls, bin_ids: np.ndarray, x_amounts: np.ndarray, y_amounts: np.ndarray) -> Self:
+        return cls(np.ascontiguousarray(bin_ids, dtype=np.int32),
+                   np.ascontiguousarray(x_amounts, dtype=np.float64),
+                   np.ascontiguousarray(y_amounts, dtype=np.float64))
+
+    @property
+    def nbytes(self) -> int:
+        return self.bin_ids.nbytes + self.x_amounts.nbytes + self.y_amounts.nbytes
+
+    def to_list(self) -> list:
+        return [self.bin_ids.tobytes(), self.x_amounts.tobytes(), self.y_amounts.tobytes(), self.updated_at]
+
+    @classmethod
+    def from_list(cls, data: list) -> Self:
+        bin_ids, x_amounts, y_amounts, updated_at = data
+        return cls(np.frombuffer(bin_ids, dtype=np.int32), np.frombuffer(x_amounts, dtype=np.float64),
+                   np.frombuffer(y_amounts, dtype=np.float64), updated_at)
+
+
+@dataclass
+class StorageState(MsgPackable):
+    """State container implementing MsgPackable protocol"""
+    VERSION: int = 1
+
+    version: int = VERSION
+    snapshots: OrderedDict[str, PositionSnapshot] = field(default_factory=OrderedDict)  # position -> snapshot, LRU
+
+    def to_msgpack(self) -> dict:
+        """Serialize to msgpack format"""
+        return {
+            'version': self.version,
+            'snapshots': [[position, snapshot.to_list()] for position, snapshot in self.snapshots.items()]
+        }
+
+    @classmethod
+    def from_msgpack(cls, data: dict) -> Self:
+        try:
+            state = cls()
+            state.version = data.get('version', cls.VERSION)
+            for position, snapshot in data.get('snapshots', []):
+                state.snapshots[position] = PositionSnapshot.from_list(snapshot)
+            return state
+
+        except Exception as e:
+            raise StorageError(f"Failed to deserialize storage state: {e}")
+
+
+class PositionSnapshotStorage(BaseStorage[StorageState]):
+    """
+    Last charted bin amounts of each open position, to draw the change on its next chart.
+    Snapshots not updated for ttl seconds are dropped, then the least recently updated ones
+    while the snapshots take more than max_bytes.
+    """
+
+    def __init__(self, file_path: str | Path,
+                 max_bytes: int = 8 * 1024 * 1024,
+                 ttl: float = 7 * 24 * 3600,
+                 save_interval: float = 30.0,
+                 batch_size: int = 100,
+                 **kwargs):
+        config = StorageConfig(
+            file_path=Path(file_path),
+            save_interval=save_interval,
+            batch_size=batch_size,
+            **kwargs
+        )
+        super().__init__(config)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.total_bytes = 0
+        self.stats = {
+            "expired": 0,
+            "evicted": 0
+        }
+
+    def create_empty_state(self) -> StorageState:
+        """Create an empty storage state"""
+        return StorageState()
+
+    def state_from_msgpack(self, data: dict) -> StorageState:
+        """Create state from msgpack data"""
+        return StorageState.from_msgpack(data)
+
+    async def _load_state(self) -> None:
+        await super()._load_state()
+        self.total_bytes = sum(snapshot.nbytes for snapshot in self.state.snapshots.values())
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired snapshots, then the least recently updated ones beyond max_bytes"""
+        snapshots = self.state.snapshots
+        expired_before = time.time() - self.ttl
+        while snapshots:
+            position, snapshot = next(iter(snapshots.items()))
+            if snapshot.updated_at >= expired_before and self.total_bytes <= self.max_bytes:
+                break
+            snapshots.popitem(last=False)
+            self.total_bytes -= snapshot.nbytes
+            self.stats["expired" if snapshot.updated_at < expired_before else "evicted"] += 1
+            self._modified = True
+
+    async def get(self, position: str) -> Optional[PositionSnapshot]:
+        """Get the snapshot of a position unless it expired"""
+        snapshot = self.state.snapshots.get(position)
+        if snapshot is None or snapshot.updated_at < time.time() - self.ttl:
+            return None
+        return snapshot
+
+    async def swap(self, position: str, snapshot: PositionSnapshot) -> Optional[PositionSnapshot]:
+        """Store the snapshot of a position, and get the one it replaces unless it expired"""
+        try:
+            async with self._lock:
+                previous = self.state.snapshots.pop(position, None)
+                if previous is not None:
+                    self.total_bytes -= previous.nbytes
+                    if previous.updated_at < time.time() - self.ttl:
+                        self.stats["expired"] += 1
+                        previous = None
+                self.state.snapshots[position] = snapshot
+                self.total_bytes += snapshot.nbytes
+                self._evict()
+                self._mark_modified()
+                return previous
+
+        except Exception as e:
+            raise StorageOperationError(f"Failed to store snapshot: {e}")
+
+    async def remove_position(self, position: str) -> bool:
+        """Drop the snapshot of a closed position"""
+        async with self._lock:
+            snapshot = self.state.snapshots.pop(position, None)
+            if snapshot is None:
+                return False
+            self.total_bytes -= snapshot.nbytes
+            self._mark_modified()
+            return True
+
+    def get_stats(self) -> dict:
+        """Get snapshot count, size and eviction counters"""
+        return {
+            **self.stats,
+            "positions": len(self.state.snapshots) if self.state else 0,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes
+        }
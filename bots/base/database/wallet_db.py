@@ -5,6 +5,8 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Self
 
+import base58
+
 from config.constants import LPCONNECT
 from libs.utils.base_storage import (
     BaseStorage, StorageConfig, StorageError,
@@ -50,6 +52,7 @@ class StorageState(MsgPackable):
     wallets: Dict[WalletKey, bool] = field(default_factory=dict)  # bool represents is_anonymous
     discord_wallets: Dict[str, Set[WalletKey]] = field(default_factory=lambda: {})
     wallet_discord: Dict[str, str] = field(default_factory=dict)
+    wallet_pubkeys: Set[bytes] = field(default_factory=set)  # raw 32-byte wallet pubkeys
 
     def to_msgpack(self) -> dict:
         """Serialize to msgpack format"""
@@ -77,6 +80,7 @@ class StorageState(MsgPackable):
                     state.discord_wallets[key.discord_id] = set()
                 state.discord_wallets[key.discord_id].add(key)
                 state.wallet_discord[key.wallet_address] = key.discord_id
+                state.wallet_pubkeys.add(base58.b58decode(key.wallet_address))
 
             return state
 
@@ -124,6 +128,7 @@ class WalletStorage(BaseStorage[StorageState]):
                     self.state.discord_wallets[discord_id].add(key)
 
                     self.state.wallet_discord[wallet_address] = discord_id
+                    self.state.wallet_pubkeys.add(base58.b58decode(wallet_address))
                     self._mark_modified()
 
                 return is_new
@@ -139,6 +144,7 @@ class WalletStorage(BaseStorage[StorageState]):
                 del self.state.wallets[key]
                 self.state.discord_wallets[discord_id].discard(key)
                 del self.state.wallet_discord[wallet_address]
+                self.state.wallet_pubkeys.discard(base58.b58decode(wallet_address))
                 self._mark_modified()
                 return True
             return False
@@ -160,6 +166,10 @@ class WalletStorage(BaseStorage[StorageState]):
         """Get all unique wallet addresses"""
         return list(self.state.wallet_discord.keys())
 
+    def get_wallet_pubkeys(self) -> Set[bytes]:
+        """Get raw 32-byte pubkeys of all wallets, for matching against undecoded event data"""
+        return self.state.wallet_pubkeys
+
     async def is_wallet_anonymous(self, wallet_address: str) -> bool:
         """Check if a wallet is set to anonymous mode"""
         discord_id = await self.get_discord_id_by_wallet(wallet_address)
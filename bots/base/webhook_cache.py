@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, Self
+
+from config.constants import LPCONNECT
+from libs.utils.base_storage import BaseStorage, StorageConfig, StorageError, MsgPackable
+
+logger = logging.getLogger(LPCONNECT)
+
+
+@dataclass
+class StorageState(MsgPackable):
+    """State container implementing MsgPackable protocol"""
+    VERSION: int = 1
+
+    version: int = VERSION
+    # transaction_id -> first seen unix timestamp, kept in insertion (and therefore expiry) order
+    entries: OrderedDict[str, float] = field(default_factory=OrderedDict)
+
+    def to_msgpack(self) -> dict:
+        """Serialize to msgpack format"""
+        return {
+            'version': self.version,
+            'entries': [[transaction_id, seen_at] for transaction_id, seen_at in self.entries.items()]
+        }
+
+    @classmethod
+    def from_msgpack(cls, data: dict) -> Self:
+        try:
+            state = cls()
+            state.version = data.get('version', cls.VERSION)
+            for transaction_id, seen_at in data.get('entries', []):
+                state.entries[transaction_id] = seen_at
+            return state
+
+        except Exception as e:
+            raise StorageError(f"Failed to deserialize storage state: {e}")
+
+
+class WebhookCache(BaseStorage[StorageState]):
+    """
+    Duplicate filter for webhook deliveries from Helius,
+    which implements at-least-once delivery guarantee and may send the same webhook multiple times.
+
+    Entries live in an insertion ordered hash map. Since every entry shares the same TTL, insertion order
+    is also expiry order, so lookups are O(1) and expired entries are always popped from the front.
+    When persisted, the recent transaction ids are journaled to disk so a restart does not re-post
+    events that Helius redelivers.
+    """
+
+    def __init__(self, file_path: str | Path,
+                 maxsize: int = 50000,
+                 ttl_seconds: float = 1800,
+                 persist: bool = True,
+                 save_interval: float = 5.0,
+                 batch_size: int = 1000,
+                 **kwargs):
+        config = StorageConfig(
+            file_path=Path(file_path),
+            save_interval=save_interval,
+            batch_size=batch_size,
+            **kwargs
+        )
+        super().__init__(config)
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds
+        self.persist = persist
+        self.state = self.create_empty_state()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "evicted": 0
+        }
+
+    def create_empty_state(self) -> StorageState:
+        """Create an empty storage state"""
+        return StorageState()
+
+    def state_from_msgpack(self, data: dict) -> StorageState:
+        """Create state from msgpack data"""
+        return StorageState.from_msgpack(data)
+
+    async def initialize(self) -> None:
+        """Load the journal of recently seen transactions if persistence is enabled"""
+        if not self.persist:
+            return
+        await super().initialize()
+        self._expire(time.time())
+        logger.info(f"Loaded {len(self.state.entries)} recent webhook transactions from journal")
+
+    async def close(self) -> None:
+        """Flush the journal if persistence is enabled"""
+        if not self.persist:
+            return
+        self._expire(time.time())
+        self._modified = True
+        await super().close()
+
+    def _mark_journal_modified(self) -> None:
+        """Schedule a journal save, in-memory only caches are never written"""
+        if self.persist:
+            self._mark_modified()
+
+    def _expire(self, now: float) -> None:
+        """Drop entries older than the TTL, oldest first"""
+        entries = self.state.entries
+        expired = 0
+        while entries:
+            if now - next(iter(entries.values())) <= self.ttl:
+                break
+            entries.popitem(last=False)
+            expired += 1
+        if expired:
+            self.stats["expired"] += expired
+            self._mark_journal_modified()
+
+    async def add(self, transaction_id: str) -> None:
+        """
+        Add new transaction to cache with current timestamp.
+        Oldest entries are removed when maxsize is reached.
+        """
+        now = time.time()
+        self._expire(now)
+        entries = self.state.entries
+        if transaction_id in entries:
+            return
+        entries[transaction_id] = now
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.stats["evicted"] += 1
+        self._mark_journal_modified()
+
+    async def exists(self, transaction_id: str) -> bool:
+        """Check if transaction was recently processed."""
+        self._expire(time.time())
+        if transaction_id in self.state.entries:
+            self.stats["hits"] += 1
+            return True
+        self.stats["misses"] += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss/eviction counters."""
+        return {
+            **self.stats,
+            "size": len(self.state.entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "persist": self.persist
+        }
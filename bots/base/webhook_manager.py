@@ -1,14 +1,26 @@
 import asyncio
+import bisect
 import datetime
+import heapq
 import logging
+import time
 import traceback
 from collections import deque
-from typing import Dict, Any, Protocol, runtime_checkable
+from dataclasses import dataclass, field
+from enum import IntEnum
+from itertools import count
+from typing import Dict, Any, List, Set, Protocol, runtime_checkable
 
 from config.constants import LPCONNECT
+from libs.helius.helius_webhook_parser import helius_webhook_is_position_lifecycle, helius_webhook_ordering_key
 
 logger = logging.getLogger(LPCONNECT)
 
+WAIT_TIME_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+THROUGHPUT_WINDOW_SECONDS = 60
+MIN_RETRY_AFTER_SECONDS = 1
+MAX_RETRY_AFTER_SECONDS = 60
+
 
 @runtime_checkable
 class TransactionProcessor(Protocol):
@@ -16,24 +28,99 @@ class TransactionProcessor(Protocol):
         """Process transaction"""
 
 
+class Lane(IntEnum):
+    """Queue priority lanes, lower value is served first"""
+    POSITION_LIFECYCLE = 0  # position create/close
+    LIQUIDITY = 1  # add/remove liquidity, fee claims and everything else
+
+
+class WaitTimeHistogram:
+    """Cumulative histogram of queue wait times in seconds"""
+
+    def __init__(self, buckets: tuple = WAIT_TIME_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def to_json(self) -> Dict[str, Any]:
+        buckets = {}
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + ('inf',), self.counts):
+            cumulative += bucket_count
+            buckets[f"le_{bound}"] = cumulative
+        return {
+            "buckets": buckets,
+            "count": cumulative,
+            "avg": self.total / cumulative if cumulative else 0.0,
+            "max": self.max
+        }
+
+
+@dataclass
+class LaneStats:
+    enqueued: int = 0
+    processed: int = 0
+    failed: int = 0
+    wait_time: WaitTimeHistogram = field(default_factory=WaitTimeHistogram)
+    completions: deque = field(default_factory=lambda: deque(maxlen=10000))
+
+    def throughput(self, now: float) -> float:
+        """Completed transactions per second over the last throughput window"""
+        while self.completions and now - self.completions[0] > THROUGHPUT_WINDOW_SECONDS:
+            self.completions.popleft()
+        return len(self.completions) / THROUGHPUT_WINDOW_SECONDS
+
+    def to_json(self, now: float) -> Dict[str, Any]:
+        return {
+            "enqueued": self.enqueued,
+            "processed": self.processed,
+            "failed": self.failed,
+            "throughput_per_second": self.throughput(now),
+            "wait_time_seconds": self.wait_time.to_json()
+        }
+
+
 class WebhookManager:
+    """
+    Schedules webhook transactions over a pool of workers.
+
+    Transactions are sharded by ordering key (see helius_webhook_ordering_key). Each key has its own heap of
+    pending transactions ordered by slot, and only one worker drains a key at a time, so events of one owner run
+    strictly in slot order while different keys run in parallel. Keys with position create/close transactions
+    are picked up by workers ahead of keys holding only liquidity updates. The total number of pending
+    transactions is bounded, add_webhook rejects batches that do not fit.
+    """
+
     def __init__(self,
                  transaction_processor: TransactionProcessor,
                  max_queue_size: int = 10000,
-                 num_workers: int = 5):
+                 num_workers: int = 10):
         """Initialize the WebhookManager."""
-        self.incoming_queue = asyncio.Queue(maxsize=max_queue_size)
-        self.processing_queue = asyncio.Queue()
+        self.max_queue_size = max_queue_size
+        self.pending: Dict[str, List[tuple]] = {}  # key -> heap of (slot, seq, lane, enqueued_at, transaction)
+        self.pending_count = 0
+        self.ready_keys = asyncio.PriorityQueue()  # (lane, seq, key) of keys waiting for a worker
+        self.scheduled_lanes: Dict[str, Lane] = {}  # best lane a waiting key was scheduled with
+        self.active_keys: Set[str] = set()
         self.num_workers = num_workers
         self.workers = []
         self.is_running = False
         self.position_service = transaction_processor
+        self._sequence = count()
         self.stats = {
             "received": 0,
             "processed": 0,
             "failed": 0,
+            "rejected": 0,
             "queue_size": 0
         }
+        self.lane_stats = {lane: LaneStats() for lane in Lane}
         self.recent_failures = deque(maxlen=100)
 
     async def start(self):
@@ -46,72 +133,83 @@ class WebhookManager:
             asyncio.create_task(self._process_queue(f"worker-{i}"))
             for i in range(self.num_workers)
         ]
-
-        # Start queue manager
-        self.queue_manager = asyncio.create_task(self._manage_queues())
         logger.info(f"Started {self.num_workers} workers")
 
     async def stop(self):
         """Gracefully stop the webhook manager."""
         logger.info("Stopping WebhookManager...")
-        self.is_running = False
 
-        # Wait for queues to empty
-        await self.incoming_queue.join()
-        await self.processing_queue.join()
+        # Wait for every scheduled key to be drained
+        await self.ready_keys.join()
+        self.is_running = False
 
         # Cancel all workers
         for worker in self.workers:
             worker.cancel()
-        self.queue_manager.cancel()
 
         # Wait for workers to finish
         await asyncio.gather(*self.workers, return_exceptions=True)
         logger.info("WebhookManager stopped")
 
-    async def add_webhook(self, content: Dict[str, Any]) -> bool:
-        """Add a webhook to the processing queue."""
-        try:
-            self.stats["received"] += 1
+    async def add_webhook(self, content: Dict[str, Any] | List[Dict[str, Any]]) -> bool:
+        """
+        Add webhook transactions to the processing queue.
+        A batch is accepted or rejected as a whole, returns False when the queue cannot take it.
+        """
+        transactions = content if isinstance(content, list) else [content]
+        self.stats["received"] += len(transactions)
 
-            await asyncio.wait_for(
-                self.incoming_queue.put(content),
-                timeout=1.0
-            )
-            self.stats["queue_size"] = self.incoming_queue.qsize()
-            return True
-        except asyncio.TimeoutError:
-            self.stats["failed"] += 1
+        if self.pending_count + len(transactions) > self.max_queue_size:
+            self.stats["rejected"] += len(transactions)
             self.recent_failures.append({
                 "timestamp": datetime.datetime.now(datetime.UTC).isoformat(),
                 "reason": "Queue full",
-                "queue_size": self.incoming_queue.qsize()
+                "queue_size": self.pending_count
             })
             return False
 
-    async def _manage_queues(self):
-        """Move items from incoming queue to processing queue."""
-        while self.is_running:
-            try:
-                content = await self.incoming_queue.get()
-                await self.processing_queue.put(content)
-                self.incoming_queue.task_done()
-            except Exception as e:
-                logger.error(f"Queue management error: {e}")
-                await asyncio.sleep(1)
+        enqueued_at = time.monotonic()
+        for transaction in transactions:
+            if isinstance(transaction, dict):
+                lane = Lane.POSITION_LIFECYCLE if helius_webhook_is_position_lifecycle(
+                    transaction) else Lane.LIQUIDITY
+                key = helius_webhook_ordering_key(transaction)
+                slot = transaction.get('slot') or 0
+            else:
+                lane, key, slot = Lane.LIQUIDITY, 'N/A', 0
+            self._schedule(key, lane, (slot, next(self._sequence), lane, enqueued_at, transaction))
+            self.lane_stats[lane].enqueued += 1
+        self.stats["queue_size"] = self.pending_count
+        return True
+
+    def _schedule(self, key: str, lane: Lane, item: tuple) -> None:
+        """Add item to its key heap, and hand the key to a worker unless one is already on it."""
+        heapq.heappush(self.pending.setdefault(key, []), item)
+        self.pending_count += 1
+        if key in self.active_keys:
+            return  # the worker draining this key will pick the item up
+        scheduled_lane = self.scheduled_lanes.get(key)
+        if scheduled_lane is None or lane < scheduled_lane:
+            # Scheduling a key again with a better lane leaves a stale entry behind, workers skip those
+            self.scheduled_lanes[key] = lane
+            self.ready_keys.put_nowait((lane, next(self._sequence), key))
+
+    def get_retry_after(self) -> int:
+        """Estimate in seconds how long it takes to drain the current queue."""
+        now = time.monotonic()
+        throughput = sum(stats.throughput(now) for stats in self.lane_stats.values())
+        if not throughput:
+            return MAX_RETRY_AFTER_SECONDS
+        return int(min(max(self.pending_count / throughput, MIN_RETRY_AFTER_SECONDS), MAX_RETRY_AFTER_SECONDS))
 
-    async def _process_webhook(self, content: Any, worker_id: str):
-        """Process webhook content."""
+    async def _process_transaction(self, transaction: Dict[str, Any], worker_id: str) -> bool:
+        """Process single webhook transaction."""
         try:
-            if isinstance(content, dict):
-                content = [content]
-            elif not isinstance(content, list):
-                logger.error(f"Unexpected content type: {type(content)}")
+            if not isinstance(transaction, dict):
+                logger.error(f"Unexpected transaction type: {type(transaction)}")
                 return False
 
-            tasks = [self.position_service.process_transaction(transaction)
-                     for transaction in content]
-            await asyncio.gather(*tasks)
+            await self.position_service.process_transaction(transaction)
             return True
 
         except Exception as e:
@@ -124,31 +222,67 @@ class WebhookManager:
             })
             return False
 
+    async def _drain_key(self, key: str, worker_id: str):
+        """Process every pending transaction of a key in slot order."""
+        heap = self.pending[key]
+        while heap:
+            _, _, lane, enqueued_at, transaction = heapq.heappop(heap)
+            lane_stats = self.lane_stats[lane]
+            lane_stats.wait_time.observe(time.monotonic() - enqueued_at)
+            success = await self._process_transaction(transaction, worker_id)
+            if success:
+                self.stats["processed"] += 1
+                lane_stats.processed += 1
+            else:
+                self.stats["failed"] += 1
+                lane_stats.failed += 1
+            lane_stats.completions.append(time.monotonic())
+            self.pending_count -= 1
+            self.stats["queue_size"] = self.pending_count
+
     async def _process_queue(self, worker_id: str):
-        """Process items from the queue."""
+        """Process keys from the ready queue."""
         logger.info(f"Worker {worker_id} started")
         while self.is_running:
             try:
-                content = await self.processing_queue.get()
-                success = await self._process_webhook(content, worker_id)
-                if success:
-                    self.stats["processed"] += 1
-                else:
-                    self.stats["failed"] += 1
-                self.processing_queue.task_done()
+                _, _, key = await self.ready_keys.get()
+            except asyncio.CancelledError:
+                break
+            try:
+                if key in self.active_keys or key not in self.pending:
+                    continue  # stale entry, the key was already drained or is being drained
+                self.active_keys.add(key)
+                self.scheduled_lanes.pop(key, None)
+                try:
+                    await self._drain_key(key, worker_id)
+                finally:
+                    self.active_keys.discard(key)
+                    if not self.pending[key]:
+                        del self.pending[key]
+                    else:  # interrupted, let another worker continue with the key
+                        self.scheduled_lanes[key] = Lane.LIQUIDITY
+                        self.ready_keys.put_nowait((Lane.LIQUIDITY, next(self._sequence), key))
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 logger.error(f"Worker {worker_id}: Processing error: {e}")
                 await asyncio.sleep(1)
+            finally:
+                self.ready_keys.task_done()
         logger.info(f"Worker {worker_id} stopped")
 
     def get_status(self) -> Dict[str, Any]:
         """Get current status and statistics."""
+        now = time.monotonic()
+        get_processor_status = getattr(self.position_service, 'get_status', None)
         return {
             "stats": self.stats,
             "is_running": self.is_running,
             "recent_failures": list(self.recent_failures),
-            "incoming_queue_size": self.incoming_queue.qsize(),
-            "processing_queue_size": self.processing_queue.qsize()
+            "queue_size": self.pending_count,
+            "queue_capacity": self.max_queue_size,
+            "pending_keys": len(self.pending),
+            "active_keys": len(self.active_keys),
+            "lanes": {lane.name.lower(): stats.to_json(now) for lane, stats in self.lane_stats.items()},
+            "processor": get_processor_status() if get_processor_status else {}
         }
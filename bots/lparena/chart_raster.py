@@ -0,0 +1,128 @@
+import io
+import math
+import os
+from functools import lru_cache
+from typing import Optional, Tuple
+
+import matplotlib
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+WIDTH, HEIGHT = 1200, 600  # 12x6 inches at 100 dpi, like the matplotlib chart
+PAD = 15  # figure padding of tight_layout, 1.08 font sizes
+TICK_LENGTH = 5
+TICK_LABEL_PAD = 5
+FONT_SIZE = 14  # 10pt at 100 dpi
+BAR_WIDTH = 0.8
+X_MARGIN = 0.05
+Y_MARGIN = 0.05
+DELTA_ALPHA = 0.5
+
+BG = (0x1E, 0x21, 0x30)
+X_COLOR = (0xFF, 0x6B, 0x6B)
+Y_COLOR = (0x4E, 0xCD, 0xC4)
+DELTA_COLOR = (0x9D, 0x4E, 0xDD)
+TEXT_COLOR = (0xFF, 0xFF, 0xFF)
+_BASE_PALETTE = np.array([BG, Y_COLOR, X_COLOR], dtype=np.float64)
+PALETTE = np.vstack([_BASE_PALETTE, _BASE_PALETTE * (1 - DELTA_ALPHA) + np.array(DELTA_COLOR) * DELTA_ALPHA]
+                    ).astype(np.uint8)  # background, y, x, then the same under a delta bar
+
+
+@lru_cache(maxsize=1)
+def _get_font() -> ImageFont.FreeTypeFont:
+    """Load DejaVu Sans from the matplotlib data directory, the font of the matplotlib chart"""
+    return ImageFont.truetype(os.path.join(matplotlib.get_data_path(), 'fonts', 'ttf', 'DejaVuSans.ttf'), FONT_SIZE)
+
+
+def _render_label(text: str) -> Image.Image:
+    """Render a tick label rotated by 45 degrees, as an RGBA image"""
+    font = _get_font()
+    left, top, right, bottom = font.getbbox(text)
+    label = Image.new('RGBA', (right - left, bottom - top), TEXT_COLOR + (0,))
+    ImageDraw.Draw(label).text((-left, -top), text, font=font, fill=TEXT_COLOR + (255,))
+    return label.rotate(45, resample=Image.BICUBIC, expand=True)
+
+
+def _get_x_limits(bin_ids: np.ndarray) -> Tuple[float, float]:
+    low, high = bin_ids[0] - BAR_WIDTH / 2, bin_ids[-1] + BAR_WIDTH / 2
+    margin = (high - low) * X_MARGIN
+    return low - margin, high + margin
+
+
+def render_position_chart_raster(bin_ids: np.ndarray, prices: np.ndarray, x_amounts: np.ndarray,
+                                 y_amounts: np.ndarray,
+                                 prev_bin_ids: Optional[np.ndarray] = None,
+                                 prev_x_amounts: Optional[np.ndarray] = None,
+                                 prev_y_amounts: Optional[np.ndarray] = None) -> bytes:
+    """
+    Render the position chart to PNG like render_position_chart, without building a matplotlib figure.
+    Bars are rasterized column by column into a numpy buffer, only the tick labels are drawn by Pillow.
+    """
+    from bots.lparena.position_embed_utils import find_representative_indices, get_chart_deltas
+
+    x_heights = x_amounts * prices
+    total_heights = y_amounts + x_heights
+
+    delta_low = delta_high = None
+    if prev_bin_ids is not None:
+        # Edges of the delta bar of each bin, equal when the bin did not change or is new
+        deltas = get_chart_deltas(bin_ids, prices, total_heights, prev_bin_ids, prev_x_amounts, prev_y_amounts)
+        index = np.searchsorted(bin_ids, deltas.bin_ids)
+        delta_low, delta_high = total_heights.copy(), total_heights.copy()
+        delta_low[index] = np.minimum(deltas.before, deltas.after)
+        delta_high[index] = np.maximum(deltas.before, deltas.after)
+
+    representative_indices = find_representative_indices(bin_ids, x_amounts, y_amounts)
+    labels = {i: _render_label(f"{prices[i]:.9f}") for i in set(representative_indices)}
+    label_height = max(label.height for label in labels.values())
+    max_label_width = max(label.width for label in labels.values())
+
+    # Axes box, leaving room below for the rotated labels and on the left for the first one
+    x_min, x_max = _get_x_limits(bin_ids)
+    axes_top = PAD
+    axes_bottom = HEIGHT - PAD - label_height - TICK_LENGTH - TICK_LABEL_PAD
+    axes_left, axes_right = PAD, WIDTH - PAD
+    for _ in range(2):
+        scale = (axes_right - axes_left) / (x_max - x_min)
+        first_tick = axes_left + (bin_ids[representative_indices[0]] - x_min) * scale
+        overhang = PAD - (first_tick - max_label_width)
+        if overhang <= 0:
+            break
+        axes_left = min(axes_left + math.ceil(overhang), WIDTH // 2)
+    scale = (axes_right - axes_left) / (x_max - x_min)
+
+    y_max = float(total_heights.max(initial=0.0))
+    if delta_high is not None:
+        y_max = max(y_max, float(delta_high.max(initial=0.0)))
+    y_max = y_max * (1 + Y_MARGIN) if y_max > 0 else 1.0
+
+    # Map every pixel column of the axes to the bar covering it, if any, bin ids are in ascending order
+    columns = np.arange(axes_left, axes_right)
+    column_x = x_min + (columns + 0.5 - axes_left) / scale
+    bar_index = np.clip(np.searchsorted(bin_ids, np.rint(column_x)), 0, len(bin_ids) - 1)
+    covered = (bin_ids[bar_index] == np.rint(column_x)) & (np.abs(column_x - bin_ids[bar_index]) <= BAR_WIDTH / 2)
+
+    def column_values(values: np.ndarray) -> np.ndarray:
+        return np.where(covered, values[bar_index], 0.0)
+
+    # Color every pixel of the axes by index into PALETTE: background, y, x, and the same blended with the delta
+    rows = np.arange(axes_top, axes_bottom)
+    row_y = ((axes_bottom - rows - 0.5) / (axes_bottom - axes_top) * y_max)[:, None]
+    color_index = (row_y < column_values(total_heights)).view(np.uint8) + (row_y < column_values(x_heights))
+    if delta_low is not None:
+        in_delta = (row_y >= column_values(delta_low)) & (row_y < column_values(delta_high))
+        color_index += in_delta.view(np.uint8) * 3
+
+    image = np.zeros((HEIGHT, WIDTH), dtype=np.uint8)
+    image[axes_top:axes_bottom, axes_left:axes_right] = color_index
+    canvas = Image.fromarray(image)
+    canvas.putpalette(PALETTE.tobytes())
+    canvas = canvas.convert('RGB')
+    for i, label in labels.items():
+        tick = int(math.floor(axes_left + (bin_ids[i] - x_min) * scale))
+        ImageDraw.Draw(canvas).line([(tick, axes_bottom), (tick, axes_bottom + TICK_LENGTH)], fill=TEXT_COLOR)
+        canvas.paste(label, (tick - label.width, axes_bottom + TICK_LENGTH + TICK_LABEL_PAD), label)
+
+    buf = io.BytesIO()
+    canvas.save(buf, format='png')
+    return buf.getvalue()
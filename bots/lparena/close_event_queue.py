@@ -1,44 +1,183 @@
 import asyncio
+import heapq
+import logging
 import time
-from typing import Optional, Callable
+import traceback
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Optional, Callable, List, Dict, Any, Set
 
 import discord
 
+from bots.base.database.pending_close_manager import PendingCloseStorage, PendingClose
+from config.constants import LPCONNECT
 from libs.meteora.idl.meteora_dllm.events.decoder import PositionCloseEvent
 
+logger = logging.getLogger(LPCONNECT)
+
+
+@dataclass(order=True)
+class ScheduledClose:
+    due_time: float
+    sequence: int
+    event: PositionCloseEvent = field(compare=False)
+    discord_channel: discord.TextChannel = field(compare=False)
+    is_anonymous: bool = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
 
 class CloseEventQueue:
-    """Manages a queue of close position events with controlled processing."""
+    """
+    Delay queue of close position events keyed on due time.
+
+    Closes seen in webhooks are processed right away by the caller (see process_now), so they keep the ordering
+    of the webhook worker. The queue releases closes restored after a restart or scheduled with a delay:
+    a single scheduler task sleeps until the earliest due time and then releases every due event at once,
+    events are processed concurrently up to max_workers. Closes are persisted when a storage is given,
+    so pending closes survive restarts.
 
-    def __init__(self, handler_fn: Callable, max_workers: int = 10):
-        """Initialize the queue with a maximum number of concurrent workers."""
-        self.queue: asyncio.Queue = asyncio.Queue()
+    A close stays persisted until its handler succeeds, failed closes are rescheduled with an exponential
+    backoff of retry_delay up to max_attempts. Handlers call mark_done before side effects that must not
+    repeat, such as Discord posts, so a close is neither retried nor restored past that point.
+    """
+
+    def __init__(self, handler_fn: Callable, max_workers: int = 10, delay_seconds: float = 0,
+                 storage: Optional[PendingCloseStorage] = None,
+                 max_attempts: int = 5, retry_delay: float = 30.0):
+        """Initialize the queue with a maximum number of concurrent workers and a processing delay per event."""
+        self.heap: List[ScheduledClose] = []
+        self.delay_seconds = delay_seconds
         self.processing_task: Optional[asyncio.Task] = None
         self.max_workers = max_workers
         self.semaphore = asyncio.Semaphore(max_workers)
         self.handler_fn = handler_fn
+        self.storage = storage
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._sequence = count()
+        self._wakeup = asyncio.Event()
+        self._in_flight = set()
+        self._done: Set[str] = set()
+        self.stats = {
+            "scheduled": 0,
+            "processed": 0,
+            "failed": 0,
+            "retried": 0,
+            "given_up": 0,
+            "last_lag_seconds": 0.0,
+            "max_lag_seconds": 0.0
+        }
+
+    async def initialize(self, discord_channel: discord.TextChannel) -> None:
+        """Reschedule closes persisted before a restart."""
+        if self.storage is None:
+            return
+        pending_closes = await self.storage.get_pending_closes()
+        for pending in pending_closes:
+            event = PositionCloseEvent(block_time=pending.block_time, tx=pending.tx,
+                                       position=pending.position, owner=pending.owner, slot=pending.slot)
+            self._push(ScheduledClose(pending.due_time, next(self._sequence), event, discord_channel,
+                                      pending.is_anonymous, pending.attempts))
+        if pending_closes:
+            logger.info(f"Restored {len(pending_closes)} pending close events")
+            self._ensure_running()
 
     async def add_event(self, event: PositionCloseEvent,
                         discord_channel: discord.TextChannel,
-                        is_anonymous: bool) -> None:
-        """Add a close position event to the queue and start processing if needed."""
-        await self.queue.put((event, discord_channel, is_anonymous, time.time()))
+                        is_anonymous: bool,
+                        delay_seconds: Optional[float] = None,
+                        attempts: int = 0) -> None:
+        """Schedule a close position event and start processing if needed."""
+        due_time = time.time() + (self.delay_seconds if delay_seconds is None else delay_seconds)
+        await self._persist(event, is_anonymous, due_time, attempts)
+        self._push(ScheduledClose(due_time, next(self._sequence), event, discord_channel, is_anonymous, attempts))
+        self._ensure_running()
+
+    async def process_now(self, event: PositionCloseEvent,
+                          discord_channel: discord.TextChannel,
+                          is_anonymous: bool) -> None:
+        """Process a close position event in the calling task, persisted first so a restart picks it up again."""
+        due_time = time.time()
+        await self._persist(event, is_anonymous, due_time)
+        self.stats["scheduled"] += 1
+        await self.process_event(ScheduledClose(due_time, next(self._sequence), event, discord_channel, is_anonymous))
+
+    async def _persist(self, event: PositionCloseEvent, is_anonymous: bool, due_time: float,
+                       attempts: int = 0) -> None:
+        if self.storage is not None:
+            await self.storage.add_pending_close(PendingClose(event.tx, event.block_time, event.position, event.owner,
+                                                              is_anonymous, due_time, event.slot, attempts))
+
+    async def mark_done(self, tx: str) -> None:
+        """Drop a close from the storage before its handler does what must not repeat, it is not retried after."""
+        self._done.add(tx)
+        if self.storage is not None:
+            await self.storage.remove_pending_close(tx)
+
+    def _push(self, scheduled: ScheduledClose) -> None:
+        heapq.heappush(self.heap, scheduled)
+        self.stats["scheduled"] += 1
+        self._wakeup.set()
+
+    def _ensure_running(self) -> None:
         if self.processing_task is None or self.processing_task.done():
             self.processing_task = asyncio.create_task(self.process_queue())
 
     async def process_queue(self) -> None:
-        """Process events in the queue, waiting if necessary before processing each event."""
-        while not self.queue.empty():
-            event, discord_channel, is_anonymous, arrival_time = await self.queue.get()
-            current_time = time.time()
-            wait_time = max(60 - (current_time - arrival_time), 0)
-            if wait_time > 0:
-                await asyncio.sleep(wait_time)
-            await self.process_event(event, discord_channel, is_anonymous)
-
-    async def process_event(self, event: PositionCloseEvent,
-                            discord_channel: discord.TextChannel,
-                            is_anonymous: bool) -> None:
+        """Release due events as their time comes, until the queue is empty."""
+        while self.heap:
+            now = time.time()
+            while self.heap and self.heap[0].due_time <= now:
+                scheduled = heapq.heappop(self.heap)
+                lag = now - scheduled.due_time
+                self.stats["last_lag_seconds"] = lag
+                self.stats["max_lag_seconds"] = max(self.stats["max_lag_seconds"], lag)
+                task = asyncio.create_task(self.process_event(scheduled))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+            if not self.heap:
+                break
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.heap[0].due_time - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def process_event(self, scheduled: ScheduledClose) -> None:
         """Process a single close position event, using a semaphore to limit concurrent processing."""
+        event = scheduled.event
+        succeeded = False
         async with self.semaphore:
-            await self.handler_fn(event, discord_channel, is_anonymous)
+            try:
+                await self.handler_fn(event, scheduled.discord_channel, scheduled.is_anonymous)
+                succeeded = True
+                self.stats["processed"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Failed to process close event {event} (attempt {scheduled.attempts + 1}): {e}")
+                logger.error(traceback.format_exc())
+
+        done = event.tx in self._done
+        self._done.discard(event.tx)
+        attempts = scheduled.attempts + 1
+        if not succeeded and not done and attempts < self.max_attempts:
+            self.stats["retried"] += 1
+            await self.add_event(event, scheduled.discord_channel, scheduled.is_anonymous,
+                                 delay_seconds=self.retry_delay * 2 ** scheduled.attempts, attempts=attempts)
+            return
+        if not succeeded and not done:
+            self.stats["given_up"] += 1
+            logger.error(f"Giving up on close event {event} after {attempts} attempts")
+        if self.storage is not None:
+            await self.storage.remove_pending_close(event.tx)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get pending count, lag and processing statistics."""
+        now = time.time()
+        return {
+            **self.stats,
+            "pending": len(self.heap),
+            "in_flight": len(self._in_flight),
+            "next_due_in_seconds": self.heap[0].due_time - now if self.heap else None,
+            "overdue_lag_seconds": max(now - self.heap[0].due_time, 0.0) if self.heap else 0.0
+        }
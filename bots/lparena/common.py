@@ -1,6 +1,7 @@
 import io
 from datetime import datetime
 from io import BytesIO
+from typing import List, Tuple, Optional
 
 import discord
 import pandas as pd
@@ -9,6 +10,7 @@ from matplotlib import pyplot as plt
 
 from bots.base.database.position_performance_manager import PositionPerformance
 from libs.utils.format import prettify_number
+from libs.utils.render_pool import get_render_pool
 
 BLUE = 0x0000ff
 PURPLE = 0x9932cc
@@ -34,7 +36,9 @@ def add_debug_info(embed, event):
         )
 
 
-def generate_performance_table(performance: PositionPerformance, name_x: str, name_y: str):
+def get_performance_table_data(performance: PositionPerformance, name_x: str, name_y: str
+                               ) -> Tuple[List[List[str]], List[str], str]:
+    """Get the rows, column labels and background color of the performance table"""
     profit = performance.withdrawals.value_in_y + performance.fees_earned.value_in_y - performance.deposits.value_in_y
 
     data = [
@@ -58,7 +62,11 @@ def generate_performance_table(performance: PositionPerformance, name_x: str, na
         background_color = '#ffb3b3'  # Light red
     else:
         background_color = '#ffffb3'  # Light yellow
+    return data, columns, background_color
 
+
+def render_performance_table(data: List[List[str]], columns: List[str], background_color: str) -> bytes:
+    """Render the performance table to PNG, runs in the render pool"""
     fig, ax = plt.subplots(figsize=(7, 2.2), dpi=100, facecolor=background_color)
     ax.set_facecolor(background_color)
     ax.axis('off')
@@ -95,14 +103,27 @@ def generate_performance_table(performance: PositionPerformance, name_x: str, na
     buf = io.BytesIO()
     plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.1, facecolor=background_color, edgecolor='none',
                 dpi=100)
-    buf.seek(0)
     plt.close(fig)
 
-    return buf
+    return buf.getvalue()
+
+
+async def generate_performance_table(performance: PositionPerformance, name_x: str, name_y: str
+                                     ) -> Optional[io.BytesIO]:
+    """Render the performance table off the event loop, None when it could not be rendered"""
+    image = await get_render_pool().render(render_performance_table,
+                                           *get_performance_table_data(performance, name_x, name_y))
+    return io.BytesIO(image) if image is not None else None
+
+
+def drop_missing_image(embed: Embed, image) -> None:
+    """Remove the attachment image of an embed when the image could not be rendered"""
+    if image is None:
+        embed.set_image(url=None)
 
 
-def create_position_close_embed(performance: PositionPerformance,
-                                position_index: int, create_event_block_time: int, event, token_x, token_y):
+async def create_position_close_embed(performance: PositionPerformance,
+                                      position_index: int, create_event_block_time: int, event, token_x, token_y):
     profit = performance.withdrawals.value_in_y + performance.fees_earned.value_in_y - performance.deposits.value_in_y
     sign = ''
     if profit > 0:
@@ -117,14 +138,15 @@ def create_position_close_embed(performance: PositionPerformance,
     )
     embed.add_field(name="", value=f"Duration: {format_time_distance(create_event_block_time)}", inline=False)
     add_debug_info(embed, event)
-    table_image = generate_performance_table(performance, token_x, token_y)
+    table_image = await generate_performance_table(performance, token_x, token_y)
     embed.set_image(url="attachment://performance_table.png")
+    drop_missing_image(embed, table_image)
     embed.set_footer(text="LP Arena Bot 🤖 Powered by Meteora ☄️")
 
     return embed, table_image
 
 
-def create_session_close_embed(performance: PositionPerformance, token_x, token_y):
+async def create_session_close_embed(performance: PositionPerformance, token_x, token_y):
     # FIXME add duration and entry/exit price and value in USD + % profit
     profit = performance.withdrawals.value_in_y + performance.fees_earned.value_in_y - performance.deposits.value_in_y
     sign = ''
@@ -138,8 +160,9 @@ def create_session_close_embed(performance: PositionPerformance, token_x, token_
         description=f"Net Profit is **{sign}{prettify_number(abs(profit))}** {token_y}",
         color=GOLD
     )
-    table_image = generate_performance_table(performance, token_x, token_y)
+    table_image = await generate_performance_table(performance, token_x, token_y)
     embed.set_image(url="attachment://performance_table.png")
+    drop_missing_image(embed, table_image)
     embed.set_footer(text="LP Arena Bot 🤖 Powered by Meteora ☄️")
     return embed, table_image
 
@@ -5,8 +5,11 @@ from pathlib import Path
 from bots.base.base_lp_bot import BaseLPBot
 from bots.base.database.cleanup_manager import CleanupManager
 from bots.base.database.lbpair_token_manager import LBPairTokenStorage
+from bots.base.database.pending_close_manager import PendingCloseStorage
+from bots.base.database.position_event_manager import PositionEventStorage
 from bots.base.database.position_index_manager import PositionIndexStorage
 from bots.base.database.position_performance_manager import PositionPerformanceStorage
+from bots.base.database.position_snapshot_manager import PositionSnapshotStorage
 from bots.base.database.session_manager import SessionStorage
 from bots.base.database.vote_manager import VoteStorage
 from bots.base.token_thread_manager import TokenThreadManager
@@ -15,6 +18,8 @@ from bots.lparena.commands import setup_commands
 from bots.lparena.lparena_config import LPArenaConfig
 from bots.lparena.transaction_processor import PositionService, StorageProviders
 from config.constants import LPCONNECT
+from libs.utils.render_cache import RenderCache
+from libs.utils.render_pool import RenderPool, set_render_pool
 
 logger = logging.getLogger(LPCONNECT)
 
@@ -36,6 +41,13 @@ class LPArenaBot(BaseLPBot):
         self.session_storage = SessionStorage(Path(config.storage_dir) / "sessions.msgpack",
                                               self.config.cleanup_timeout)
         self.lbpair_token_storage = LBPairTokenStorage(Path(config.storage_dir) / "lbpair_tokens.msgpack")
+        self.pending_close_storage = PendingCloseStorage(Path(config.storage_dir) / "pending_closes.msgpack")
+        self.position_event_storage = PositionEventStorage(Path(config.storage_dir) / "position_events.msgpack")
+        self.position_snapshot_storage = PositionSnapshotStorage(
+            Path(config.storage_dir) / "position_snapshots.msgpack")
+        self.render_cache = RenderCache(Path(config.storage_dir) / "render_cache.msgpack")
+        self.render_pool = RenderPool(config.render_workers, cache=self.render_cache)
+        set_render_pool(self.render_pool)
 
         setup_commands(
             self.tree,
@@ -68,16 +80,22 @@ class LPArenaBot(BaseLPBot):
             self.position_performance_storage,
             self.vote_storage,
             self.lbpair_token_storage,
-            self.wallet_storage
+            self.wallet_storage,
+            self.pending_close_storage,
+            self.position_event_storage,
+            self.position_snapshot_storage
         )
 
-        return PositionService(
-            self.config.solana_rpc,
+        position_service = PositionService(
+            self.solana_client,
             discord_channel,
             self.discord_client,
             self.token_thread_manager,
-            storage_provider
+            storage_provider,
+            self.config.chart_backend
         )
+        await position_service.initialize()
+        return position_service
 
     def _setup_event_handlers(self):
         super()._setup_event_handlers()
@@ -95,6 +113,11 @@ class LPArenaBot(BaseLPBot):
         await self.position_performance_storage.initialize()
         await self.lbpair_token_storage.initialize()
         await self.wallet_storage.initialize()
+        await self.pending_close_storage.initialize()
+        await self.position_event_storage.initialize()
+        await self.position_snapshot_storage.initialize()
+        await self.render_cache.initialize()
+        await self.render_pool.start()
         await self.wallet_manager.sync_webhook_with_db()
 
         cleanup_manager = CleanupManager(
@@ -6,12 +6,16 @@ from dotenv import load_dotenv
 
 from bots.base.bot_config import BotConfig
 
+CHART_BACKENDS = ('matplotlib', 'raster')
+
 
 @dataclass
 class LPArenaConfig(BotConfig):
     """Configuration container for the Discord bot"""
     anonymous_channel_id: int
     cleanup_timeout: int
+    render_workers: int
+    chart_backend: str
 
     @classmethod
     def from_env(cls, dotenv_path: str) -> Self:
@@ -22,6 +26,10 @@ class LPArenaConfig(BotConfig):
         # Get new config values
         anonymous_channel_id = int(os.getenv('ANONYMOUS_NOTIFICATIONS_CHANNEL_ID', '0'))
         cleanup_timeout = int(os.getenv('CLEANUP_TIMEOUT', '60'))
+        render_workers = int(os.getenv('RENDER_WORKERS', '2'))
+        chart_backend = os.getenv('CHART_BACKEND', 'matplotlib')
+        if chart_backend not in CHART_BACKENDS:
+            raise ValueError(f"CHART_BACKEND must be one of {', '.join(CHART_BACKENDS)}")
 
         # Get all fields from base dataclass
         base_fields = {field.name: getattr(base, field.name)
@@ -31,5 +39,7 @@ class LPArenaConfig(BotConfig):
         return cls(
             **base_fields,
             anonymous_channel_id=anonymous_channel_id,
-            cleanup_timeout=cleanup_timeout
+            cleanup_timeout=cleanup_timeout,
+            render_workers=render_workers,
+            chart_backend=chart_backend
         )
@@ -1,10 +1,12 @@
 import logging
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
 
 from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Confirmed
 from solders.pubkey import Pubkey
 
+from bots.base.database.position_event_manager import PositionEventStorage, PositionEventLog, LoggedTransaction
 from bots.base.database.position_performance_manager import PositionPerformance, TokenBalance
 from config.constants import LPCONNECT
 from libs.birdeye.birdeye import determine_optimal_time_interval, get_historical_price, AddressType, \
@@ -14,28 +16,55 @@ from libs.meteora.idl.meteora_dllm.accounts import LbPair
 from libs.meteora.idl.meteora_dllm.events.decoder import DLMMEvent, ClaimFeeEvent, AddLiquidityEvent
 from libs.meteora.idl.meteora_dllm.events.decoder import RemoveLiquidityEvent, PositionCreateEvent
 from libs.meteora.parse_dlmm_events import parse_dlmm_events
-from libs.solana.get_transactions import get_all_transactions
+from libs.solana.account_cache import get_decoded_accounts
+from libs.solana.get_transactions import get_all_signatures, stream_transactions
 from libs.utils.datatypes import PricePoint
-from libs.utils.utils import get_token_decimals
+from libs.utils.utils import get_tokens_decimals
 
 logger = logging.getLogger(LPCONNECT)
 
 
-async def fetch_dlmm_events(client: AsyncClient, account: str) -> List[DLMMEvent]:
-    transactions = await get_all_transactions(client, account)
-    logging.debug(f"Fetched {len(transactions)} DLMM events transactions: {transactions}")
-    events = []
-    for transaction in reversed(transactions):
-        events.extend(parse_dlmm_events(transaction))
-    return events
+async def fetch_dlmm_events(client: AsyncClient, account: str, until_tx: Optional[str] = None,
+                            until_slot: Optional[int] = None,
+                            event_storage: Optional[PositionEventStorage] = None) -> List[DLMMEvent]:
+    """
+    Fetch the DLMM event history of a position account.
+    Transactions already in the position event log are not fetched again: only signatures newer than the log
+    sync cursor are listed, and only listed transactions missing from the log are fetched.
+    With until_slot, the slot of until_tx, signatures are listed once the RPC node reached it, so the history
+    includes until_tx without polling.
+    """
+    log = await event_storage.get_log(account) if event_storage is not None else PositionEventLog()
+    signatures = await get_all_signatures(client, account, commitment=Confirmed, until=log.synced_until,
+                                          min_context_slot=until_slot)
+    missing = [signature for signature in signatures
+               if signature.err is None and str(signature.signature) not in log.transactions]
+    backfilled = {}
+    # Transactions are decoded as they arrive, while the next ones are still being fetched
+    async for signature, transaction in stream_transactions(client, (signature.signature for signature in missing),
+                                                            ordered=False, commitment=Confirmed):
+        if transaction is None:
+            continue
+        events = [event for event in parse_dlmm_events(transaction) if getattr(event, 'position', None) == account]
+        backfilled[str(signature)] = LoggedTransaction(transaction.slot, transaction.block_time, events)
+    logging.debug(f"Fetched {len(backfilled)} of {len(missing)} missing DLMM events transactions of {account}")
+    log.transactions.update(backfilled)
+    # The cursor only moves past the listed signatures once none of them is missing anymore
+    synced_until = str(signatures[0].signature) if signatures and len(backfilled) == len(missing) else None
+    if event_storage is not None:
+        await event_storage.add_synced_transactions(account, backfilled, synced_until)
+    if until_tx is not None and until_tx not in log.transactions and \
+            not any(str(signature.signature) == until_tx for signature in signatures):
+        logger.warning(f"History of {account} does not include {until_tx}")
+    return log.get_events()
 
 
 async def calculate_closed_position_performance(client: AsyncClient, events: List[DLMMEvent]) -> PositionPerformance:
     create_position_event = next(event for event in events if isinstance(event, PositionCreateEvent))
-    lb_pair = await LbPair.fetch(client, Pubkey.from_string(create_position_event.lbPair))
+    lb_pair, = await get_decoded_accounts(client, [(Pubkey.from_string(create_position_event.lbPair), LbPair.decode)])
 
-    base_token_decimal = await get_token_decimals(client, lb_pair.token_x_mint)
-    quote_token_decimal = await get_token_decimals(client, lb_pair.token_y_mint)
+    base_token_decimal, quote_token_decimal = await get_tokens_decimals(client, [lb_pair.token_x_mint,
+                                                                                 lb_pair.token_y_mint])
 
     performance = PositionPerformance()
     fee_claim_events: List[ClaimFeeEvent] = []
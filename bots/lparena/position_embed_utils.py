@@ -1,15 +1,30 @@
 import io
+from typing import Optional
 
 import numpy as np
 from discord import Embed, File
 from matplotlib import pyplot as plt
 
+from bots.base.database.position_snapshot_manager import PositionSnapshot, PositionSnapshotStorage
+from bots.lparena.chart_raster import render_position_chart_raster
 from bots.lparena.common import BLUE, ORANGE, GREEN, add_debug_info, PURPLE
+from libs.meteora.bin_array import get_float_prices_per_token, align_bins, get_bin_deltas, BinDeltas
 from libs.meteora.idl.meteora_dllm.events.decoder import AddLiquidityEvent
 from libs.utils.format import prettify_number
+from libs.utils.render_pool import get_render_pool
 from libs.utils.utils import convert_value
 
 
+def get_moved_bin_indices(position, previous: PositionSnapshot) -> np.ndarray:
+    """Get the indices of the position bins whose amounts changed since the previous snapshot"""
+    bin_ids = position.bins.bin_ids
+    x_deltas = get_bin_deltas(bin_ids, position.bins.position_x_amounts.astype(np.float64),
+                              previous.bin_ids, previous.x_amounts)
+    y_deltas = get_bin_deltas(bin_ids, position.bins.position_y_amounts.astype(np.float64),
+                              previous.bin_ids, previous.y_amounts)
+    return np.searchsorted(bin_ids, x_deltas.bin_ids[x_deltas.changed() | y_deltas.changed()])
+
+
 def create_fee_claim_embed(position, claimed_fee_x, claimed_fee_y, position_index, event, token_x, token_y):
     embed = Embed(
         title=f"💰 Fee Claimed",
@@ -28,7 +43,8 @@ def create_fee_claim_embed(position, claimed_fee_x, claimed_fee_y, position_inde
     return embed
 
 
-def create_position_update_embed(position, event, position_index, token_x, token_y):
+def create_position_update_embed(position, event, position_index, token_x, token_y,
+                                 previous: Optional[PositionSnapshot] = None):
     is_add = isinstance(event, AddLiquidityEvent)
     action = "Liquidity Added" if is_add else "Liquidity Removed"
     action_emoji = "💧" if is_add else "🔻"
@@ -60,6 +76,19 @@ def create_position_update_embed(position, event, position_index, token_x, token
         inline=False
     )
 
+    if previous is not None:
+        moved = get_moved_bin_indices(position, previous)
+        if len(moved):
+            embed.add_field(
+                name="",
+                value=(
+                    f"**Moved:** `{len(moved)}` bins in "
+                    f"`{prettify_number(position.bins.prices_per_token[moved[0]])}` - "
+                    f"`{prettify_number(position.bins.prices_per_token[moved[-1]])}` {token_y}/{token_x}"
+                ),
+                inline=False
+            )
+
     add_debug_info(embed, event)
     add_footer(embed, position, position_index, token_x, token_y)
     embed.set_image(url="attachment://chart.png")
@@ -75,8 +104,8 @@ def create_new_position_embed(position, pair_data, token_x, token_y, thread, cre
     embed.add_field(
         name="",
         value=(
-            f"**Range**: `{prettify_number(position.position_bin_data[0].price_per_token)}` - "
-            f"`{prettify_number(position.position_bin_data[-1].price_per_token)}` "
+            f"**Range**: `{prettify_number(position.bins.prices_per_token[0])}` - "
+            f"`{prettify_number(position.bins.prices_per_token[-1])}` "
             f"{token_y}/{token_x}\n"
             f"**Liquidity**: `{prettify_number(position.total_y_amount)}` {token_y} | "
             f"`{prettify_number(position.total_x_amount)}` {token_x}"
@@ -134,8 +163,8 @@ def add_footer(embed, position, position_index, token_x, token_y):
     embed.add_field(
         name="",
         value=(
-            f"**Range**: `{prettify_number(position.position_bin_data[0].price_per_token)}` - "
-            f"`{prettify_number(position.position_bin_data[-1].price_per_token)}` "
+            f"**Range**: `{prettify_number(position.bins.prices_per_token[0])}` - "
+            f"`{prettify_number(position.bins.prices_per_token[-1])}` "
             f"{token_y}/{token_x}"
         ),
         inline=False
@@ -180,16 +209,41 @@ def find_representative_indices(bin_ids, x_amounts, y_amounts):
     return [0, min(any_liquidity_indices), mid_index, max(any_liquidity_indices), total_bins - 1]
 
 
-positions_history = {}
-
-
-async def create_chart(position, position_address: str):
-    # Get current position data
-    bin_ids = np.array([d.bin_id for d in position.position_bin_data])
-    prices = np.array([d.price_per_token for d in position.position_bin_data])
-    x_amounts = np.array([d.position_x_amount for d in position.position_bin_data])
-    y_amounts = np.array([d.position_y_amount for d in position.position_bin_data])
-
+async def create_chart(position, position_address: str, snapshot_storage: PositionSnapshotStorage,
+                       backend: str = "matplotlib") -> Optional[File]:
+    """Render the position chart off the event loop, with deltas to the previous chart of the position"""
+    snapshot = PositionSnapshot.from_columns(position.bins.bin_ids, position.bins.position_x_amounts,
+                                             position.bins.position_y_amounts)
+    prices = get_float_prices_per_token(position.lb_pair_info.bin_step, snapshot.bin_ids, position.base_token_decimal,
+                                        position.quote_token_decimal)
+
+    prev_bin_ids = prev_x_amounts = prev_y_amounts = None
+    previous = await snapshot_storage.get(position_address)
+    if previous is not None:
+        prev_bin_ids, prev_x_amounts, prev_y_amounts = previous.bin_ids, previous.x_amounts, previous.y_amounts
+
+    image = await get_render_pool().render(CHART_RENDERERS[backend], snapshot.bin_ids, prices, snapshot.x_amounts,
+                                           snapshot.y_amounts, prev_bin_ids, prev_x_amounts, prev_y_amounts)
+    if image is None:
+        return None
+    # Only a chart that was posted becomes the baseline of the next deltas
+    await snapshot_storage.swap(position_address, snapshot)
+    return File(io.BytesIO(image), filename="chart.png")
+
+
+def get_chart_deltas(bin_ids: np.ndarray, prices: np.ndarray, total_heights: np.ndarray, prev_bin_ids: np.ndarray,
+                     prev_x_amounts: np.ndarray, prev_y_amounts: np.ndarray) -> BinDeltas:
+    """Get the change of the bar heights from the previous chart, valued at the current prices"""
+    index, prev_index = align_bins(bin_ids, prev_bin_ids)
+    prev_total_heights = prev_y_amounts[prev_index] + prev_x_amounts[prev_index] * prices[index]
+    return BinDeltas(bin_ids[index], prev_total_heights, total_heights[index])
+
+
+def render_position_chart(bin_ids: np.ndarray, prices: np.ndarray, x_amounts: np.ndarray, y_amounts: np.ndarray,
+                          prev_bin_ids: Optional[np.ndarray] = None,
+                          prev_x_amounts: Optional[np.ndarray] = None,
+                          prev_y_amounts: Optional[np.ndarray] = None) -> bytes:
+    """Render the position chart to PNG, runs in the render pool"""
     x_heights = x_amounts * prices
     total_heights = y_amounts + x_heights
 
@@ -207,31 +261,13 @@ async def create_chart(position, position_address: str):
     ax.bar(bin_ids, total_heights, width=0.8, color=scheme['y'], edgecolor='none')
     ax.bar(bin_ids, x_heights, width=0.8, color=scheme['x'], edgecolor='none')
 
-    # Draw deltas if we have history
-    if position_address in positions_history:
-        prev_data = positions_history[position_address]
-        prev_bin_ids = np.array([d.bin_id for d in prev_data.position_bin_data])
-        prev_x_amounts = np.array([d.position_x_amount for d in prev_data.position_bin_data])
-        prev_y_amounts = np.array([d.position_y_amount for d in prev_data.position_bin_data])
-
-        prev_x_heights = prev_x_amounts * prices
-        prev_total_heights = prev_y_amounts + prev_x_heights
-
-        # Draw delta bars
-        for i, bin_id in enumerate(bin_ids):
-            prev_idx = np.where(prev_bin_ids == bin_id)[0]
-            if len(prev_idx) > 0:
-                prev_idx = prev_idx[0]
-                delta = total_heights[i] - prev_total_heights[prev_idx]
-
-                if delta > 0:
-                    # Growth: draw from old height
-                    ax.bar(bin_id, delta, bottom=prev_total_heights[prev_idx],
-                           width=0.8, color=scheme['delta'], edgecolor='none', alpha=0.5)
-                elif delta < 0:
-                    # Decrease: draw from new height
-                    ax.bar(bin_id, abs(delta), bottom=total_heights[i],
-                           width=0.8, color=scheme['delta'], edgecolor='none', alpha=0.5)
+    # Draw deltas if we have history, growth from the old height and decreases from the new one
+    if prev_bin_ids is not None:
+        deltas = get_chart_deltas(bin_ids, prices, total_heights, prev_bin_ids, prev_x_amounts, prev_y_amounts)
+        changed = deltas.deltas != 0
+        ax.bar(deltas.bin_ids[changed], np.abs(deltas.deltas[changed]),
+               bottom=np.minimum(deltas.before, deltas.after)[changed],
+               width=0.8, color=scheme['delta'], edgecolor='none', alpha=0.5)
 
     # Rest of the styling remains the same
     for spine in ax.spines.values():
@@ -251,8 +287,12 @@ async def create_chart(position, position_address: str):
 
     buf = io.BytesIO()
     plt.savefig(buf, format='png', facecolor=scheme['bg'], edgecolor='none')
-    buf.seek(0)
     plt.close(fig)
 
-    positions_history[position_address] = position
-    return File(buf, filename="chart.png")
+    return buf.getvalue()
+
+
+CHART_RENDERERS = {
+    "matplotlib": render_position_chart,
+    "raster": render_position_chart_raster
+}
@@ -8,15 +8,18 @@ import discord
 from solana.rpc.async_api import AsyncClient
 
 from bots.base.database.lbpair_token_manager import LBPairTokenStorage
+from bots.base.database.pending_close_manager import PendingCloseStorage
+from bots.base.database.position_event_manager import PositionEventStorage
 from bots.base.database.position_index_manager import PositionIndexStorage
 from bots.base.database.position_performance_manager import PositionPerformanceStorage
+from bots.base.database.position_snapshot_manager import PositionSnapshotStorage
 from bots.base.database.session_manager import SessionStorage
 from bots.base.database.vote_manager import VoteStorage
 from bots.base.database.wallet_manager import WalletStorage
 from bots.base.token_thread_manager import TokenThreadManager
 from bots.base.webhook_manager import TransactionProcessor
 from bots.lparena.close_event_queue import CloseEventQueue
-from bots.lparena.common import create_position_close_embed
+from bots.lparena.common import create_position_close_embed, drop_missing_image
 from bots.lparena.pnl_calculator import fetch_dlmm_events, calculate_closed_position_performance
 from bots.lparena.position_embed_utils import create_position_update_embed, create_chart, create_fee_claim_embed, \
     create_secondary_position_embed, create_new_position_embed
@@ -31,6 +34,8 @@ from libs.utils.utils import string_to_int_id
 
 logger = logging.getLogger(LPCONNECT)
 
+KNOWN_EVENT_TYPES = (AddLiquidityEvent, RemoveLiquidityEvent, ClaimFeeEvent, PositionCreateEvent, PositionCloseEvent)
+
 
 @dataclass
 class StorageProviders:
@@ -41,36 +46,56 @@ class StorageProviders:
     vote_storage: VoteStorage
     lbpair_token_storage: LBPairTokenStorage
     wallet_storage: WalletStorage
+    pending_close_storage: PendingCloseStorage
+    position_event_storage: PositionEventStorage
+    position_snapshot_storage: PositionSnapshotStorage
 
 
 class PositionService(TransactionProcessor):
     """Service for handling position-related operations"""
 
-    def __init__(self, solana_rpc: str, discord_channel: discord.TextChannel,
+    def __init__(self, solana_client: AsyncClient, discord_channel: discord.TextChannel,
                  discord_client: discord.Client,
                  token_thread_manager: TokenThreadManager,
-                 storage_providers: StorageProviders):
+                 storage_providers: StorageProviders,
+                 chart_backend: str = "matplotlib"):
         self.token_thread_manager = token_thread_manager
         self.discord_channel = discord_channel
         self.discord_client = discord_client
-        self.solana_client = AsyncClient(solana_rpc)
+        self.solana_client = solana_client
         self.message_lock = asyncio.Lock()
         self.transaction_semaphore = asyncio.Semaphore(10)
         self.storage = storage_providers
-        self.close_event_queue = CloseEventQueue(self.handle_close_position)
+        self.chart_backend = chart_backend
+        self.close_event_queue = CloseEventQueue(self.handle_close_position,
+                                                 storage=storage_providers.pending_close_storage)
+
+    async def initialize(self) -> None:
+        """Restore work scheduled before a restart"""
+        await self.close_event_queue.initialize(self.discord_channel)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get status of background processing"""
+        return {
+            "close_event_queue": self.close_event_queue.get_status(),
+            "position_snapshots": self.storage.position_snapshot_storage.get_stats(),
+            "rpc": self.solana_client.get_stats() if hasattr(self.solana_client, 'get_stats') else {}
+        }
 
     async def process_transaction(self, transaction: Dict[str, Any]) -> None:
         """Process a single transaction and handle relevant events."""
         try:
             async with self.transaction_semaphore:
-                events = helius_webhook_parse_dlmm_events(transaction)
+                events = helius_webhook_parse_dlmm_events(transaction,
+                                                          owners=self.storage.wallet_storage.get_wallet_pubkeys(),
+                                                          event_types=KNOWN_EVENT_TYPES)
 
                 if not events:
                     return
-                known_events = [event for event in events if isinstance(event, (
-                    AddLiquidityEvent, RemoveLiquidityEvent, ClaimFeeEvent, PositionCreateEvent, PositionCloseEvent))]
+                known_events = [event for event in events if isinstance(event, KNOWN_EVENT_TYPES)]
                 if not known_events or not await self.storage.wallet_storage.wallet_exists(known_events[0].owner):
                     return
+                await self.storage.position_event_storage.record_events(known_events)
                 is_anonymous = await self.storage.wallet_storage.is_wallet_anonymous(known_events[0].owner)
                 mode_suffix = " in anonymous mode" if is_anonymous else ""
                 logger.debug(f"Processing transaction {known_events[0].tx}{mode_suffix}")
@@ -82,7 +107,10 @@ class PositionService(TransactionProcessor):
 
                 close_position_event = next((event for event in events if isinstance(event, PositionCloseEvent)), None)
                 if close_position_event:
-                    await self.close_event_queue.add_event(close_position_event, self.discord_channel, is_anonymous)
+                    await self.storage.position_snapshot_storage.remove_position(close_position_event.position)
+                    # Processed by this worker, so later events of the owner wait until the close is done
+                    await self.close_event_queue.process_now(close_position_event, self.discord_channel,
+                                                             is_anonymous)
                     return
                 if is_anonymous:
                     return
@@ -118,15 +146,19 @@ class PositionService(TransactionProcessor):
             thread, position_index = await self.get_thread_and_position_index(event, discord_channel)
             if thread is None or position_index is None:
                 return
-            position = await get_position_info(self.solana_client, event.position, update_tx=event.tx)
+            position = await get_position_info(self.solana_client, event.position, update_tx=event.tx,
+                                               update_slot=event.slot)
             if position is None:
                 logger.error(f"Failed to fetch position {event.position} info [tx:{event.tx}]")
                 return
             token_x, token_y = await self.storage.lbpair_token_storage.get_tokens(event.lbPair)
             chart_file = None
             if isinstance(event, (AddLiquidityEvent, RemoveLiquidityEvent)):
-                embed = create_position_update_embed(position, event, position_index, token_x, token_y)
-                chart_file = await create_chart(position, event.position)
+                previous = await self.storage.position_snapshot_storage.get(event.position)
+                embed = create_position_update_embed(position, event, position_index, token_x, token_y, previous)
+                chart_file = await create_chart(position, event.position, self.storage.position_snapshot_storage,
+                                                self.chart_backend)
+                drop_missing_image(embed, chart_file)
             elif isinstance(event, ClaimFeeEvent):
                 embed = create_fee_claim_embed(position, event.feeX, event.feeY, position_index, event, token_x,
                                                token_y)
@@ -149,15 +181,18 @@ class PositionService(TransactionProcessor):
                                                                                              event.position)
             thread = await self.storage.session_storage.get_thread(event.lbPair, event.owner, discord_channel)
             user, user_id, user_name = await self.get_user_name_by_wallet(event.owner)
-            position = await get_position_info(self.solana_client, event.position, update_tx=event.tx)
+            position = await get_position_info(self.solana_client, event.position, update_tx=event.tx,
+                                               update_slot=event.slot)
 
             if thread:
-                chart_file = await create_chart(position, event.position)
+                chart_file = await create_chart(position, event.position, self.storage.position_snapshot_storage,
+                                                self.chart_backend)
                 await self.storage.session_storage.open_position(event.lbPair, event.owner)
 
                 token_x, token_y = await self.storage.lbpair_token_storage.get_tokens(event.lbPair)
 
                 embed = create_secondary_position_embed(position, position_index, event, token_x, token_y)
+                drop_missing_image(embed, chart_file)
 
                 message = await thread.send(embed=embed, file=chart_file)
                 logger.debug(f"Message: {message.id} TX:{event.tx}")
@@ -172,7 +207,8 @@ class PositionService(TransactionProcessor):
             if is_anonymous:
                 return
 
-            chart_file = await create_chart(position, event.position)
+            chart_file = await create_chart(position, event.position, self.storage.position_snapshot_storage,
+                                            self.chart_backend)
             title = f"{token_x}-{token_y} by {user_name} "
             pair_data = await fetch_pair_data(position.info.position.lb_pair)
 
@@ -181,6 +217,7 @@ class PositionService(TransactionProcessor):
                                                                           discord_channel, title)
                 embed = create_new_position_embed(position, pair_data, token_x, token_y, thread,
                                                   user_name, event)
+                drop_missing_image(embed, chart_file)
                 message = await discord_channel.send(embed=embed, file=chart_file)
                 placeholder_msg = await discord_channel.send(
                     "||🎣 Fishing for gains... The big catch will be revealed here!||")
@@ -229,40 +266,44 @@ class PositionService(TransactionProcessor):
     async def handle_close_position(self, event: PositionCloseEvent,
                                     discord_channel: discord.TextChannel,
                                     is_anonymous: bool) -> None:
-        """Handle position closing events."""
-        try:
-            events = await fetch_dlmm_events(self.solana_client, event.position)
-
-            create_position_event = next((event for event in events if isinstance(event, PositionCreateEvent)), None)
-            if not create_position_event:
-                logger.error(f'No create position event found for {event}, found only {create_position_event}')
-                return
-            user, user_id, user_name = await self.get_user_name_by_wallet(event.owner)
-            try:
-                await self.token_thread_manager.handle_position_close(user_id, create_position_event.lbPair)
-            except Exception as e:
-                logger.error(f"Token thread manager failed: {e}")
-            if is_anonymous:
-                return
-
+        """
+        Handle position closing events. Errors are raised for the close event queue to retry,
+        so everything up to mark_done has to be safe to repeat.
+        """
+        events = await fetch_dlmm_events(self.solana_client, event.position, until_tx=event.tx,
+                                         until_slot=event.slot or None,
+                                         event_storage=self.storage.position_event_storage)
+
+        create_position_event = next((event for event in events if isinstance(event, PositionCreateEvent)), None)
+        if not create_position_event:
+            raise ValueError(f'No create position event found for {event}')
+        user, user_id, user_name = await self.get_user_name_by_wallet(event.owner)
+
+        thread = embed = table_image = None
+        if not is_anonymous:
             thread, position_index = await self.get_thread_and_position_index(create_position_event, discord_channel)
-            if thread is None or position_index is None:
-                return
-
-            performance = await calculate_closed_position_performance(self.solana_client, events)
-            token_x, token_y = await self.storage.lbpair_token_storage.get_tokens(create_position_event.lbPair)
-            embed, table_image = create_position_close_embed(performance,
-                                                             position_index, create_position_event.block_time, event,
-                                                             token_x, token_y)
-
-            message = await thread.send(embed=embed, file=discord.File(table_image, filename="performance_table.png"))
-            logger.debug(f"Message: {message.id} TX:{event.tx}")
-            await self.storage.position_performance_storage.update_position_performance(
-                create_position_event.owner, thread.id, create_position_event.lbPair,
-                event.position, performance)
-            await self.storage.session_storage.close_position(create_position_event.lbPair,
-                                                              create_position_event.owner)
-
+            if thread is not None and position_index is not None:
+                performance = await calculate_closed_position_performance(self.solana_client, events)
+                token_x, token_y = await self.storage.lbpair_token_storage.get_tokens(create_position_event.lbPair)
+                embed, table_image = await create_position_close_embed(performance, position_index,
+                                                                       create_position_event.block_time, event,
+                                                                       token_x, token_y)
+                await self.storage.position_performance_storage.update_position_performance(
+                    create_position_event.owner, thread.id, create_position_event.lbPair,
+                    event.position, performance)
+
+        # Nothing below may run twice for the same close
+        await self.close_event_queue.mark_done(event.tx)
+        await self.storage.position_event_storage.remove_position(event.position)
+        try:
+            await self.token_thread_manager.handle_position_close(user_id, create_position_event.lbPair)
         except Exception as e:
-            logger.error(f"Failed to handle close position event {event}: {e}")
-            logger.error(traceback.format_exc())
+            logger.error(f"Token thread manager failed: {e}")
+        if embed is None:
+            return
+
+        table_file = discord.File(table_image, filename="performance_table.png") if table_image else None
+        message = await thread.send(embed=embed, file=table_file)
+        logger.debug(f"Message: {message.id} TX:{event.tx}")
+        await self.storage.session_storage.close_position(create_position_event.lbPair,
+                                                          create_position_event.owner)
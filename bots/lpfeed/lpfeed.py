@@ -39,7 +39,7 @@ class LPFeedBot(BaseLPBot):
         await self.token_thread_manager.initialize(discord_channel)
 
         return PositionService(
-            self.config.solana_rpc,
+            self.solana_client,
             self.discord_client,
             self.token_thread_manager,
             self.lbpair_token_storage,
@@ -20,18 +20,20 @@ from libs.solana.token_metadata import get_token_metadata
 
 logger = logging.getLogger(LPCONNECT)
 
+KNOWN_EVENT_TYPES = (PositionCreateEvent, PositionCloseEvent)
+
 
 class PositionService(TransactionProcessor):
     """Service for handling position-related operations"""
 
-    def __init__(self, solana_rpc: str,
+    def __init__(self, solana_client: AsyncClient,
                  discord_client: discord.Client,
                  token_thread_manager: TokenThreadManager,
                  lbpair_token_storage: LBPairTokenStorage,
                  wallet_storage: WalletStorage):
         self.token_thread_manager = token_thread_manager
         self.discord_client = discord_client
-        self.solana_client = AsyncClient(solana_rpc)
+        self.solana_client = solana_client
         self.transaction_semaphore = asyncio.Semaphore(10)
         self.lbpair_token_storage = lbpair_token_storage
         self.wallet_storage = wallet_storage
@@ -40,7 +42,9 @@ class PositionService(TransactionProcessor):
         """Process a single transaction and handle relevant events."""
         try:
             async with self.transaction_semaphore:
-                events = helius_webhook_parse_dlmm_events(transaction)
+                events = helius_webhook_parse_dlmm_events(transaction,
+                                                          owners=self.wallet_storage.get_wallet_pubkeys(),
+                                                          event_types=KNOWN_EVENT_TYPES)
 
                 if not events:
                     logger.debug("No events found in transaction.")
@@ -48,7 +52,7 @@ class PositionService(TransactionProcessor):
 
                 # Filter known events (PositionCreateEvent, PositionCloseEvent)
                 known_events = [
-                    event for event in events if isinstance(event, (PositionCreateEvent, PositionCloseEvent))
+                    event for event in events if isinstance(event, KNOWN_EVENT_TYPES)
                 ]
 
                 if not known_events:
@@ -93,7 +97,8 @@ class PositionService(TransactionProcessor):
         try:
 
             user, user_id, user_name = await self.get_user_name_by_wallet(event.owner)
-            position = await get_position_info(self.solana_client, event.position, update_tx=event.tx)
+            position = await get_position_info(self.solana_client, event.position, update_tx=event.tx,
+                                               update_slot=event.slot)
 
             token_x, token_y = await self.get_lbpair_symbols(event, position)
             try:
@@ -1,5 +1,5 @@
 import logging
-from typing import List, Any, Dict
+from typing import List, Any, Dict, Optional, Set, Tuple, Type, Iterator
 
 import base58
 
@@ -9,15 +9,41 @@ from libs.meteora.idl.meteora_dllm.program_id import PROGRAM_ID_STR
 
 logger = logging.getLogger(LPCONNECT)
 
+POSITION_LIFECYCLE_INSTRUCTIONS = ('Instruction: InitializePosition', 'Instruction: ClosePosition')
 
-def helius_webhook_parse_dlmm_events(transaction: Dict[str, Any]) -> List[DLMMEvent]:
+
+def helius_webhook_parse_dlmm_events(transaction: Dict[str, Any],
+                                     owners: Optional[Set[bytes]] = None,
+                                     event_types: Optional[Tuple[Type[DLMMEvent], ...]] = None) -> List[DLMMEvent]:
+    """
+    Parse DLMM events of a Helius raw webhook transaction.
+    Only events of the given types whose owner is one of the given raw 32-byte pubkeys are fully decoded,
+    everything else is dropped after a discriminator and owner bytes check.
+    """
     events = []
+    discriminators = EventDecoder.get_discriminators(event_types) if event_types is not None else None
+    for event_data in _iter_dlmm_event_data(transaction):
+        if not EventDecoder.is_relevant(event_data, discriminators, owners):
+            continue
+        try:
+            events.append(EventDecoder.decode_event(event_data, transaction.get('blockTime', 0),
+                                                    transaction.get('transaction', {}).get('signatures',
+                                                                                           ['N/A'])[0],
+                                                    transaction.get('slot') or 0))
+        except:
+            logger.error(f"Failed to decode event {event_data}")
+
+    return events
+
+
+def _iter_dlmm_event_data(transaction: Dict[str, Any]) -> Iterator[bytes]:
+    """Yield the encoded DLMM events (discriminator and body) of a successful Helius raw webhook transaction"""
     meta = transaction.get('meta', {})
     tx = transaction.get('transaction', {})
     message = tx.get('message', {})
 
     if not all([meta, tx, message]) or meta.get('err') is not None:
-        return events
+        return
 
     account_keys = message.get('accountKeys', [])
 
@@ -28,12 +54,35 @@ def helius_webhook_parse_dlmm_events(transaction: Dict[str, Any]) -> List[DLMMEv
                 if account_keys[program_id_index] != PROGRAM_ID_STR:
                     continue
                 ix_data = base58.b58decode(iix.get('data', ''))
-                event_data = ix_data[8:]
-                try:
-                    events.append(EventDecoder.decode_event(event_data, transaction.get('blockTime', 0),
-                                                            transaction.get('transaction', {}).get('signatures',
-                                                                                                   ['N/A'])[0]))
-                except:
-                    logger.error(f"Failed to decode event {event_data}")
+                yield ix_data[8:]
 
-    return events
+
+def helius_webhook_is_position_lifecycle(transaction: Dict[str, Any]) -> bool:
+    """Cheaply detect position create/close transactions from the program logs, without decoding events"""
+    log_messages = transaction.get('meta', {}).get('logMessages') or []
+    return any(instruction in log for log in log_messages for instruction in POSITION_LIFECYCLE_INSTRUCTIONS)
+
+
+def helius_webhook_ordering_key(transaction: Dict[str, Any]) -> str:
+    """
+    Key under which webhook transactions must be processed in order.
+    Shards by the owner of the first DLMM event with an owner, read from the raw event bytes, which keeps every
+    position of that owner (and so every lb_pair+owner session) strictly ordered whoever pays the fee.
+    Transactions without such an event fall back to their fee payer.
+    """
+    for event_data in _iter_dlmm_event_data(transaction):
+        owner = EventDecoder.get_owner(event_data)
+        if owner is not None:
+            return base58.b58encode(owner).decode()
+
+    account_keys = transaction.get('transaction', {}).get('message', {}).get('accountKeys') or ['N/A']
+    fee_payer = account_keys[0]
+    return fee_payer.get('pubkey', 'N/A') if isinstance(fee_payer, dict) else fee_payer
+
+
+def helius_webhook_account_keys(transaction: Dict[str, Any]) -> List[str]:
+    """Every account referenced by the transaction, including addresses loaded from lookup tables"""
+    account_keys = [key.get('pubkey') if isinstance(key, dict) else key
+                    for key in transaction.get('transaction', {}).get('message', {}).get('accountKeys') or []]
+    loaded_addresses = transaction.get('meta', {}).get('loadedAddresses') or {}
+    return account_keys + loaded_addresses.get('writable', []) + loaded_addresses.get('readonly', [])
@@ -1,9 +1,14 @@
 import logging
+import struct
+from collections import OrderedDict
 from dataclasses import asdict, dataclass
-from decimal import Decimal
+from decimal import Decimal, Context
 from functools import lru_cache
 from typing import Tuple, List
 
+import numpy as np
+from anchorpy.coder.accounts import ACCOUNT_DISCRIMINATOR_SIZE
+from anchorpy.error import AccountInvalidDiscriminator
 from solders.pubkey import Pubkey
 
 from config.constants import LPCONNECT
@@ -14,6 +19,32 @@ from libs.meteora.idl.meteora_dllm.types import Bin
 
 logger = logging.getLogger(LPCONNECT)
 
+BIN_ARRAY_HEADER = struct.Struct('<qB')  # index, version
+BIN_ARRAY_LB_PAIR_OFFSET = ACCOUNT_DISCRIMINATOR_SIZE + 16
+BIN_ARRAY_BINS_OFFSET = BIN_ARRAY_LB_PAIR_OFFSET + 32
+U128 = ('<u8', (2,))  # low and high 64 bits
+BIN_DTYPE = np.dtype([
+    ('amount_x', '<u8'),
+    ('amount_y', '<u8'),
+    ('price', U128),
+    ('liquidity_supply', U128),
+    ('reward_per_token_stored', '<u8', (2, 2)),
+    ('fee_amount_x_per_token_stored', U128),
+    ('fee_amount_y_per_token_stored', U128),
+    ('amount_x_in', U128),
+    ('amount_y_in', U128)
+])
+
+PRICE_TABLE_BLOCK_SIZE = 64
+DEFAULT_PRICE_TABLE_MAX_BLOCKS = 64
+MAX_PRICE_TABLES = 32
+PRICE_PRECISION = 28  # digits of the default decimal context prices were computed in
+PRICE_WORKING_PRECISION = PRICE_PRECISION + 12
+PRICE_CONTEXT = Context(prec=PRICE_PRECISION)
+PRICE_WORKING_CONTEXT = Context(prec=PRICE_WORKING_PRECISION)
+
+_bin_price_tables: OrderedDict[int, 'BinPriceTable'] = OrderedDict()
+
 
 @dataclass
 class BinLiquidity:
@@ -41,6 +72,74 @@ class PositionBinData:
         return asdict(self)
 
 
+@dataclass
+class BinColumns:
+    """Bins of a bin id range as columns, integer columns hold exact Python ints (object dtype)"""
+    bin_ids: np.ndarray  # int64
+    x_amounts: np.ndarray  # whole tokens
+    y_amounts: np.ndarray  # whole tokens
+    supplies: np.ndarray
+    versions: np.ndarray  # int64, version of the bin array of each bin
+
+
+@dataclass
+class PositionBins:
+    """Per bin data of a position as columns, see PositionBinData for the row view"""
+    bin_ids: np.ndarray  # int64
+    prices_per_token: np.ndarray  # Decimal
+    bin_x_amounts: np.ndarray  # int
+    bin_y_amounts: np.ndarray  # int
+    bin_liquidity: np.ndarray  # int
+    position_liquidity: np.ndarray  # int
+    position_x_amounts: np.ndarray  # Decimal
+    position_y_amounts: np.ndarray  # Decimal
+
+    def __len__(self) -> int:
+        return len(self.bin_ids)
+
+    def to_bin_data(self) -> List[PositionBinData]:
+        return [PositionBinData(
+            bin_id=int(bin_id),
+            price_per_token=price_per_token,
+            bin_x_amount=bin_x_amount,
+            bin_y_amount=bin_y_amount,
+            bin_liquidity=bin_liquidity,
+            position_liquidity=Decimal(position_liquidity),
+            position_x_amount=position_x_amount,
+            position_y_amount=position_y_amount
+        ) for bin_id, price_per_token, bin_x_amount, bin_y_amount, bin_liquidity, position_liquidity,
+            position_x_amount, position_y_amount in zip(self.bin_ids, self.prices_per_token, self.bin_x_amounts,
+                                                        self.bin_y_amounts, self.bin_liquidity,
+                                                        self.position_liquidity, self.position_x_amounts,
+                                                        self.position_y_amounts)]
+
+
+@dataclass
+class BinDeltas:
+    """Change of a per bin value between two snapshots, over the bins both snapshots hold"""
+    bin_ids: np.ndarray  # ascending
+    before: np.ndarray
+    after: np.ndarray
+
+    @property
+    def deltas(self) -> np.ndarray:
+        return self.after - self.before
+
+    @property
+    def increases(self) -> np.ndarray:
+        """Growth of each bin, 0 where it did not grow"""
+        return np.maximum(self.deltas, 0)
+
+    @property
+    def decreases(self) -> np.ndarray:
+        """Decrease of each bin as a positive amount, 0 where it did not decrease"""
+        return np.maximum(-self.deltas, 0)
+
+    def changed(self, rtol: float = 1e-9) -> np.ndarray:
+        """Mask of the bins whose value changed beyond float noise"""
+        return ~np.isclose(self.after, self.before, rtol=rtol, atol=0)
+
+
 def js_divmod(a: int, b: int) -> Tuple[int, int]:
     q, r = divmod(a, b)
     if r != 0 and (a < 0) != (b < 0):  # Ensure the sign of the remainder matches the JavaScript BN behavior
@@ -67,6 +166,50 @@ def is_bin_id_within_bin_array(active_id: int, bin_array_index: int) -> bool:
     return lower_bin_id <= active_id <= upper_bin_id
 
 
+def _u128_column(column: np.ndarray) -> np.ndarray:
+    """Exact Python ints from a column of little endian (low, high) u64 pairs"""
+    return column[:, 0].astype(object) | (column[:, 1].astype(object) << 64)
+
+
+class BinArrayView:
+    """
+    Zero-copy columnar view of a BinArray account, an alternative to BinArray.decode.
+    Bins are a numpy structured view over the account bytes, field columns are only converted to Python ints
+    for the requested range of bins (128-bit fields are rebuilt from their two 64-bit halves).
+    """
+    __slots__ = ('index', 'version', 'lb_pair', 'bins')
+
+    def __init__(self, index: int, version: int, lb_pair: Pubkey, bins: np.ndarray):
+        self.index = index
+        self.version = version
+        self.lb_pair = lb_pair
+        self.bins = bins
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'BinArrayView':
+        if data[:ACCOUNT_DISCRIMINATOR_SIZE] != BinArray.discriminator:
+            raise AccountInvalidDiscriminator("The discriminator for this account is invalid")
+        index, version = BIN_ARRAY_HEADER.unpack_from(data, ACCOUNT_DISCRIMINATOR_SIZE)
+        lb_pair = Pubkey.from_bytes(bytes(data[BIN_ARRAY_LB_PAIR_OFFSET:BIN_ARRAY_LB_PAIR_OFFSET + 32]))
+        bins = np.frombuffer(data, dtype=BIN_DTYPE, count=MAX_BIN_ARRAY_SIZE, offset=BIN_ARRAY_BINS_OFFSET)
+        return cls(index, version, lb_pair, bins)
+
+    def __len__(self) -> int:
+        return len(self.bins)
+
+    def amount_x(self, start: int = 0, end: int = MAX_BIN_ARRAY_SIZE) -> np.ndarray:
+        return self.bins['amount_x'][start:end].astype(object)
+
+    def amount_y(self, start: int = 0, end: int = MAX_BIN_ARRAY_SIZE) -> np.ndarray:
+        return self.bins['amount_y'][start:end].astype(object)
+
+    def liquidity_supply(self, start: int = 0, end: int = MAX_BIN_ARRAY_SIZE) -> np.ndarray:
+        return _u128_column(self.bins['liquidity_supply'][start:end])
+
+    def price(self, start: int = 0, end: int = MAX_BIN_ARRAY_SIZE) -> np.ndarray:
+        return _u128_column(self.bins['price'][start:end])
+
+
 def get_bin_from_bin_array(bin_id: int, bin_array: BinArray) -> Bin:
     lower_bin_id, upper_bin_id = get_bin_array_lower_upper_bin_id(bin_array.index)
 
@@ -92,10 +235,139 @@ def derive_bin_array(lb_pair: Pubkey, index: int, program_id: Pubkey) -> Pubkey:
     return pda
 
 
-@lru_cache(maxsize=None)
+class BinPriceTable:
+    """
+    Prices (1 + bin_step / BASIS_POINT_MAX) ** bin_id of one bin step, computed a block of bins at a time.
+
+    Each block starts from an anchor power of its first bin and fills the rest by repeated multiplication,
+    both at PRICE_WORKING_PRECISION digits, so the accumulated error stays far below the PRICE_PRECISION digits
+    prices are rounded to. Blocks are kept as Decimals and as float64 for display-only callers,
+    the least recently used blocks are dropped beyond max_blocks.
+    """
+
+    def __init__(self, bin_step: int, max_blocks: int = DEFAULT_PRICE_TABLE_MAX_BLOCKS):
+        self.bin_step = bin_step
+        self.max_blocks = max_blocks
+        self.base = PRICE_WORKING_CONTEXT.add(1, PRICE_WORKING_CONTEXT.divide(Decimal(bin_step), BASIS_POINT_MAX))
+        self.blocks: OrderedDict[int, Tuple[List[Decimal], np.ndarray]] = OrderedDict()
+
+    def _get_block(self, block_index: int) -> Tuple[List[Decimal], np.ndarray]:
+        block = self.blocks.get(block_index)
+        if block is not None:
+            self.blocks.move_to_end(block_index)
+            return block
+        price = PRICE_WORKING_CONTEXT.power(self.base, block_index * PRICE_TABLE_BLOCK_SIZE)
+        prices = []
+        for _ in range(PRICE_TABLE_BLOCK_SIZE):
+            prices.append(PRICE_CONTEXT.plus(price))
+            price = PRICE_WORKING_CONTEXT.multiply(price, self.base)
+        block = self.blocks[block_index] = (prices, np.array(prices, dtype=np.float64))
+        while len(self.blocks) > self.max_blocks:
+            self.blocks.popitem(last=False)
+        return block
+
+    def price(self, bin_id: int) -> Decimal:
+        block_index, offset = divmod(bin_id, PRICE_TABLE_BLOCK_SIZE)
+        return self._get_block(block_index)[0][offset]
+
+    def prices(self, bin_ids: np.ndarray) -> np.ndarray:
+        """Decimal prices of bins, as an object array"""
+        return np.array([self.price(bin_id) for bin_id in bin_ids.tolist()], dtype=object)
+
+    def prices_float(self, bin_ids: np.ndarray) -> np.ndarray:
+        """float64 prices of bins, for display"""
+        block_indexes, offsets = np.divmod(bin_ids, PRICE_TABLE_BLOCK_SIZE)
+        result = np.empty(len(bin_ids), dtype=np.float64)
+        for block_index in np.unique(block_indexes).tolist():
+            in_block = block_indexes == block_index
+            result[in_block] = self._get_block(block_index)[1][offsets[in_block]]
+        return result
+
+
+def get_bin_price_table(bin_step: int) -> BinPriceTable:
+    """Get the process wide price table of a bin step"""
+    table = _bin_price_tables.get(bin_step)
+    if table is None:
+        table = _bin_price_tables[bin_step] = BinPriceTable(bin_step)
+        while len(_bin_price_tables) > MAX_PRICE_TABLES:
+            _bin_price_tables.popitem(last=False)
+    else:
+        _bin_price_tables.move_to_end(bin_step)
+    return table
+
+
 def get_price_of_bin_by_bin_id(bin_step: int, bin_id: int) -> Decimal:
-    bin_step_num = Decimal(bin_step) / BASIS_POINT_MAX
-    return (bin_step_num + 1) ** bin_id
+    return get_bin_price_table(bin_step).price(bin_id)
+
+
+to_decimal = np.frompyfunc(Decimal, 1, 1)
+
+
+def get_prices_per_token(bin_step: int, bin_ids: np.ndarray, base_token_decimal: int,
+                         quote_token_decimal: int) -> np.ndarray:
+    """Decimal price per token of each bin"""
+    return get_bin_price_table(bin_step).prices(bin_ids) * Decimal(10 ** (base_token_decimal - quote_token_decimal))
+
+
+def get_float_prices_per_token(bin_step: int, bin_ids: np.ndarray, base_token_decimal: int,
+                               quote_token_decimal: int) -> np.ndarray:
+    """float64 price per token of each bin, for display"""
+    return get_bin_price_table(bin_step).prices_float(bin_ids) * 10.0 ** (base_token_decimal - quote_token_decimal)
+
+
+def align_bins(bin_ids: np.ndarray, other_bin_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the indices into both ascending bin id columns of the bins they have in common"""
+    if len(bin_ids) == 0 or len(other_bin_ids) == 0:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+    lower, upper = max(bin_ids[0], other_bin_ids[0]), min(bin_ids[-1], other_bin_ids[-1])
+    if bin_ids[-1] - bin_ids[0] == len(bin_ids) - 1 and other_bin_ids[-1] - other_bin_ids[0] == len(other_bin_ids) - 1:
+        # Contiguous ranges, like the bins of positions, overlap in a single range
+        overlap = np.arange(max(upper - lower + 1, 0), dtype=np.intp)
+        return overlap + (lower - bin_ids[0]), overlap + (lower - other_bin_ids[0])
+    other_index = np.searchsorted(other_bin_ids, bin_ids).clip(max=len(other_bin_ids) - 1)
+    index = np.flatnonzero(other_bin_ids[other_index] == bin_ids)
+    return index, other_index[index]
+
+
+def get_bin_deltas(bin_ids: np.ndarray, values: np.ndarray,
+                   prev_bin_ids: np.ndarray, prev_values: np.ndarray) -> BinDeltas:
+    """Get the change of a per bin value from a previous snapshot, bins only one snapshot holds are left out"""
+    index, prev_index = align_bins(bin_ids, prev_bin_ids)
+    return BinDeltas(bin_ids[index], prev_values[prev_index], values[index])
+
+
+def get_bin_columns_between_lower_and_upper_bound(
+        lower_bin_id: int,
+        upper_bin_id: int,
+        base_token_decimal: int,
+        quote_token_decimal: int,
+        lower_bin_array: BinArrayView,
+        upper_bin_array: BinArrayView
+) -> BinColumns:
+    """Columnar get_bins_between_lower_and_upper_bound, only the bins in range are read from the bin arrays"""
+    bin_arrays = [lower_bin_array] if bin_id_to_bin_array_index(lower_bin_id) == bin_id_to_bin_array_index(
+        upper_bin_id) else [lower_bin_array, upper_bin_array]
+
+    bin_ids, x_amounts, y_amounts, supplies, versions = [], [], [], [], []
+    for bin_array in bin_arrays:
+        lower_bin_id_for_bin_array, _ = get_bin_array_lower_upper_bin_id(bin_array.index)
+        start = max(lower_bin_id - lower_bin_id_for_bin_array, 0)
+        end = min(upper_bin_id - lower_bin_id_for_bin_array + 1, len(bin_array))
+        bin_ids.append(np.arange(lower_bin_id_for_bin_array + start, lower_bin_id_for_bin_array + end,
+                                 dtype=np.int64))
+        x_amounts.append(bin_array.amount_x(start, end))
+        y_amounts.append(bin_array.amount_y(start, end))
+        supplies.append(bin_array.liquidity_supply(start, end))
+        versions.append(np.full(max(end - start, 0), bin_array.version, dtype=np.int64))
+
+    return BinColumns(
+        bin_ids=np.concatenate(bin_ids),
+        x_amounts=np.concatenate(x_amounts) // (10 ** base_token_decimal),
+        y_amounts=np.concatenate(y_amounts) // (10 ** quote_token_decimal),
+        supplies=np.concatenate(supplies),
+        versions=np.concatenate(versions)
+    )
 
 
 def get_bins_between_lower_and_upper_bound(
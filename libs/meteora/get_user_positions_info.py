@@ -3,8 +3,10 @@ import json
 import traceback
 from dataclasses import dataclass
 from decimal import Decimal
+from functools import cached_property
 from typing import Optional, List
 
+import numpy as np
 from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Confirmed
 from solders.pubkey import Pubkey
@@ -12,12 +14,13 @@ from solders.signature import Signature
 
 from libs.meteora.idl.meteora_dllm.accounts import LbPair
 from libs.meteora.idl.meteora_dllm.program_id import PROGRAM_ID
-from .bin_array import PositionBinData, bin_id_to_bin_array_index, derive_bin_array, \
-    get_bins_between_lower_and_upper_bound
+from .bin_array import BinArrayView, PositionBinData, PositionBins, bin_id_to_bin_array_index, derive_bin_array, \
+    get_bin_columns_between_lower_and_upper_bound, get_prices_per_token, to_decimal
 from .get_positions import PositionInfo
-from .idl.meteora_dllm.accounts.bin_array import BinArray
 from .idl.meteora_dllm.accounts.position_v2 import PositionV2
-from ..utils.utils import get_token_decimals
+from ..solana.account_cache import get_decoded_accounts
+from ..solana.rpc_pool import PooledAsyncClient
+from ..utils.utils import get_tokens_decimals
 
 
 class CustomJSONEncoder(json.JSONEncoder):
@@ -33,10 +36,14 @@ class ProcessedPosition:
     lb_pair_info: LbPair
     total_x_amount: Decimal
     total_y_amount: Decimal
-    position_bin_data: List[PositionBinData]
+    bins: PositionBins
     base_token_decimal: int
     quote_token_decimal: int
 
+    @cached_property
+    def position_bin_data(self) -> List[PositionBinData]:
+        return self.bins.to_bin_data()
+
     def to_json(self):
         return json.dumps({
             'info': self.info.to_json(),
@@ -55,11 +62,14 @@ def _process_position(
         position_info: PositionInfo,
         base_token_decimal: int,
         quote_token_decimal: int,
-        lower_bin_array: BinArray,
-        upper_bin_array: BinArray
+        lower_bin_array: BinArrayView,
+        upper_bin_array: BinArrayView
 ) -> Optional[ProcessedPosition]:
-    bins = get_bins_between_lower_and_upper_bound(
-        lb_pair,
+    """
+    Compute the position amounts of every bin at once over bin columns.
+    Share math is exact integer arithmetic, each amount is rounded once when divided by the bin supply.
+    """
+    bins = get_bin_columns_between_lower_and_upper_bound(
         position_info.position.lower_bin_id,
         position_info.position.upper_bin_id,
         base_token_decimal,
@@ -68,71 +78,75 @@ def _process_position(
         upper_bin_array
     )
 
-    if not bins:
+    if not len(bins.bin_ids):
         return None
 
-    if bins[0].bin_id != position_info.position.lower_bin_id or bins[-1].bin_id != position_info.position.upper_bin_id:
+    if bins.bin_ids[0] != position_info.position.lower_bin_id or \
+            bins.bin_ids[-1] != position_info.position.upper_bin_id:
         raise ValueError("Bin ID mismatch")
 
-    position_data = []
-    total_x_amount = Decimal(0)
-    total_y_amount = Decimal(0)
-
-    for idx, _bin in enumerate(bins):
-        bin_supply = Decimal(_bin.supply)
-
-        if _bin.version == 1 and version == 1:
-            pos_share = Decimal(position_info.position.liquidity_shares[idx] << 64)
-        else:
-            pos_share = Decimal(position_info.position.liquidity_shares[idx])
-
-        position_x_amount = Decimal(0) if bin_supply == 0 else pos_share * _bin.x_amount / bin_supply
-        position_y_amount = Decimal(0) if bin_supply == 0 else pos_share * _bin.y_amount / bin_supply
+    shares = np.array(position_info.position.liquidity_shares[:len(bins.bin_ids)], dtype=object)
+    if version == 1:
+        shares = np.where(bins.versions == 1, shares << 64, shares)
 
-        total_x_amount += position_x_amount
-        total_y_amount += position_y_amount
-
-        position_data.append(PositionBinData(
-            bin_id=_bin.bin_id,
-            price_per_token=_bin.price_per_token,
-            bin_x_amount=_bin.x_amount,
-            bin_y_amount=_bin.y_amount,
-            bin_liquidity=_bin.supply,
-            position_liquidity=pos_share,
-            position_x_amount=position_x_amount,
-            position_y_amount=position_y_amount,
-        ))
+    has_supply = bins.supplies != 0
+    position_x_amounts = np.full(len(shares), Decimal(0), dtype=object)
+    position_y_amounts = np.full(len(shares), Decimal(0), dtype=object)
+    if has_supply.any():
+        supplies = bins.supplies[has_supply]
+        position_x_amounts[has_supply] = to_decimal(shares[has_supply] * bins.x_amounts[has_supply]) / supplies
+        position_y_amounts[has_supply] = to_decimal(shares[has_supply] * bins.y_amounts[has_supply]) / supplies
 
     return ProcessedPosition(
         info=position_info,
         lb_pair_info=lb_pair,
-        total_x_amount=total_x_amount,
-        total_y_amount=total_y_amount,
-        position_bin_data=position_data,
+        total_x_amount=sum(position_x_amounts, Decimal(0)),
+        total_y_amount=sum(position_y_amounts, Decimal(0)),
+        bins=PositionBins(
+            bin_ids=bins.bin_ids,
+            prices_per_token=get_prices_per_token(lb_pair.bin_step, bins.bin_ids, base_token_decimal,
+                                                  quote_token_decimal),
+            bin_x_amounts=bins.x_amounts,
+            bin_y_amounts=bins.y_amounts,
+            bin_liquidity=bins.supplies,
+            position_liquidity=shares,
+            position_x_amounts=position_x_amounts,
+            position_y_amounts=position_y_amounts
+        ),
         base_token_decimal=base_token_decimal,
         quote_token_decimal=quote_token_decimal
     )
 
 
-async def process_position(client: AsyncClient, position_info: PositionInfo) -> ProcessedPosition:
-    bin_arrays = {}
+async def process_position(client: AsyncClient, position_info: PositionInfo, min_slot: int = 0) -> ProcessedPosition:
+    """
+    Load everything a position depends on with one getMultipleAccounts call per dependency level:
+    the lb pair and both bin arrays are derived from the position, the mints from the lb pair
+    (those are usually served by the mint cache).
+    The lb pair and bin arrays come from the account cache when they were read at min_slot or later.
+    """
     lower_bin_array_index = bin_id_to_bin_array_index(position_info.position.lower_bin_id)
     upper_bin_array_index = bin_id_to_bin_array_index(position_info.position.upper_bin_id)
+    bin_array_pubkeys = {index: derive_bin_array(position_info.position.lb_pair, index, PROGRAM_ID)
+                         for index in (lower_bin_array_index, upper_bin_array_index)}
 
-    for index in {lower_bin_array_index, upper_bin_array_index}:
-        bin_array_pubkey = derive_bin_array(position_info.position.lb_pair, index, PROGRAM_ID)
-        bin_array_info = await client.get_account_info(bin_array_pubkey, commitment=Confirmed)
-        bin_arrays[index] = BinArray.decode(bin_array_info.value.data)
+    lb_pair_state, *bin_array_states = await get_decoded_accounts(
+        client,
+        [(position_info.position.lb_pair, LbPair.decode),
+         *((pubkey, BinArrayView.decode) for pubkey in bin_array_pubkeys.values())],
+        min_slot=min_slot,
+        commitment=Confirmed)
+    bin_arrays = dict(zip(bin_array_pubkeys, bin_array_states))
 
-    lb_pair_info = await client.get_account_info(position_info.position.lb_pair, commitment=Confirmed)
-    lb_pair_state = LbPair.decode(lb_pair_info.value.data)
+    base_token_decimal, quote_token_decimal = await get_tokens_decimals(client, [lb_pair_state.token_x_mint,
+                                                                                 lb_pair_state.token_y_mint])
 
     processed_position = _process_position(
         2,  # FIXME hardcode v2 only support
         lb_pair_state,
         position_info,
-        await get_token_decimals(client, lb_pair_state.token_x_mint),
-        await get_token_decimals(client, lb_pair_state.token_y_mint),
+        base_token_decimal,
+        quote_token_decimal,
         bin_arrays[lower_bin_array_index],
         bin_arrays[upper_bin_array_index]
     )
@@ -140,18 +154,30 @@ async def process_position(client: AsyncClient, position_info: PositionInfo) ->
     return processed_position
 
 
-async def get_position_info(client: AsyncClient, account_address: str, update_tx: str,
+async def get_position_info(client: PooledAsyncClient, account_address: str, update_tx: str,
+                            update_slot: Optional[int] = None,
                             max_retries: int = 8, initial_delay: float = 1.0) -> Optional[ProcessedPosition]:
+    """
+    Get the position state after update_tx. Once the slot of update_tx is known, the position is read once
+    with that slot as minimum context slot, as soon as the slot tracker sees the RPC node reach it.
+    The transaction is only fetched when its slot is not given, e.g. from the webhook payload.
+    Retries only happen while the transaction is not found or on errors.
+    """
+    tx_slot = update_slot or None
     for retry in range(max_retries):
         try:
-            tx_info = await client.get_transaction(Signature.from_string(update_tx), commitment=Confirmed)
-            if tx_info.value:
-                pubkey = Pubkey.from_string(account_address)
-                account_info = await client.get_account_info(pubkey, commitment=Confirmed)
+            if tx_slot is None:
+                tx_info = await client.get_transaction(Signature.from_string(update_tx), commitment=Confirmed)
+                if tx_info.value:
+                    tx_slot = tx_info.value.slot
+                    client.slot_tracker.observe(tx_slot)
+            if tx_slot is not None:
+                account_info = await client.get_account_info_at(Pubkey.from_string(account_address), tx_slot,
+                                                                commitment=Confirmed)
                 if account_info.value:
-                    if tx_info.value.slot <= account_info.context.slot:
-                        return await process_position(client, PositionInfo(PositionV2.decode(account_info.value.data),
-                                                                           account_info.value.owner))
+                    return await process_position(client, PositionInfo(PositionV2.decode(account_info.value.data),
+                                                                       account_info.value.owner),
+                                                  min_slot=tx_slot)
         except Exception as e:
             print(e)
             traceback.print_exc()
@@ -1,10 +1,12 @@
 import hashlib
-from dataclasses import dataclass, fields
+import struct
+from dataclasses import dataclass, field, fields
 from enum import Enum
-from typing import List, Dict, Type, TypeVar, Any
+from functools import lru_cache
+from typing import List, Dict, Type, Any, Optional, Tuple, FrozenSet, Set, Callable, NewType
 
 import base58
-from construct import Struct, Int16sl, Int32sl, Int64ul, Bytes, Flag, Array, BytesInteger
+from construct import Struct, Int16sl, Int32sl, Int64ul, Bytes, Flag, Array, BytesInteger, FormatField
 
 
 class EventType(Enum):
@@ -153,15 +155,55 @@ event_structures = {
 }
 
 
-@dataclass
+Pubkey = NewType('Pubkey', str)
+
+
+def encode_pubkey(value: bytes) -> str:
+    return base58.b58encode(value).decode('utf-8')
+
+
+class LazyPubkey:
+    """
+    Descriptor over a pubkey slot, which holds either the raw 32 bytes or the base58 string.
+    Raw bytes are encoded on first read, and the encoded string replaces them in the slot.
+    """
+    __slots__ = ('slot',)
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = self.slot.__get__(instance, owner)
+        if isinstance(value, bytes):
+            value = encode_pubkey(value)
+            self.slot.__set__(instance, value)
+        return value
+
+    def __set__(self, instance, value):
+        self.slot.__set__(instance, value)
+
+
+def event_dataclass(cls):
+    """Slotted dataclass whose Pubkey fields accept raw bytes and are base58 encoded lazily"""
+    cls = dataclass(slots=True)(cls)
+    for field_info in fields(cls):
+        if field_info.type is Pubkey and field_info.name in cls.__dict__:
+            setattr(cls, field_info.name, LazyPubkey(cls.__dict__[field_info.name]))
+    return cls
+
+
+@event_dataclass
 class DLMMEvent:
     block_time: int
     tx: str
+    slot: int = field(default=0, kw_only=True)  # slot of the transaction, 0 when unknown
 
 
-@dataclass
+@event_dataclass
 class CompositionFeeEvent(DLMMEvent):
-    owner: str
+    owner: Pubkey
     binId: int
     tokenXFeeAmount: int
     tokenYFeeAmount: int
@@ -169,28 +211,28 @@ class CompositionFeeEvent(DLMMEvent):
     protocolTokenYFeeAmount: int
 
 
-@dataclass
+@event_dataclass
 class AddLiquidityEvent(DLMMEvent):
-    lbPair: str
-    owner: str
-    position: str
+    lbPair: Pubkey
+    owner: Pubkey
+    position: Pubkey
     amounts: List[int]
     activeBinId: int
 
 
-@dataclass
+@event_dataclass
 class RemoveLiquidityEvent(DLMMEvent):
-    lbPair: str
-    owner: str
-    position: str
+    lbPair: Pubkey
+    owner: Pubkey
+    position: Pubkey
     amounts: List[int]
     activeBinId: int
 
 
-@dataclass
+@event_dataclass
 class SwapEvent(DLMMEvent):
-    lbPair: str
-    owner: str
+    lbPair: Pubkey
+    owner: Pubkey
     startBinId: int
     endBinId: int
     amountIn: int
@@ -202,117 +244,117 @@ class SwapEvent(DLMMEvent):
     hostFee: int
 
 
-@dataclass
+@event_dataclass
 class ClaimRewardEvent(DLMMEvent):
-    lbPair: str
-    position: str
-    owner: str
+    lbPair: Pubkey
+    position: Pubkey
+    owner: Pubkey
     rewardIndex: int
     totalReward: int
 
 
-@dataclass
+@event_dataclass
 class FundRewardEvent(DLMMEvent):
-    lbPair: str
-    funder: str
+    lbPair: Pubkey
+    funder: Pubkey
     rewardIndex: int
     amount: int
 
 
-@dataclass
+@event_dataclass
 class InitializeRewardEvent(DLMMEvent):
-    lbPair: str
-    rewardMint: str
-    funder: str
+    lbPair: Pubkey
+    rewardMint: Pubkey
+    funder: Pubkey
     rewardIndex: int
     rewardDuration: int
 
 
-@dataclass
+@event_dataclass
 class UpdateRewardDurationEvent(DLMMEvent):
-    lbPair: str
+    lbPair: Pubkey
     rewardIndex: int
     oldRewardDuration: int
     newRewardDuration: int
 
 
-@dataclass
+@event_dataclass
 class UpdateRewardFunderEvent(DLMMEvent):
-    lbPair: str
+    lbPair: Pubkey
     rewardIndex: int
-    oldFunder: str
-    newFunder: str
+    oldFunder: Pubkey
+    newFunder: Pubkey
 
 
-@dataclass
+@event_dataclass
 class PositionCloseEvent(DLMMEvent):
-    position: str
-    owner: str
+    position: Pubkey
+    owner: Pubkey
 
 
-@dataclass
+@event_dataclass
 class ClaimFeeEvent(DLMMEvent):
-    lbPair: str
-    position: str
-    owner: str
+    lbPair: Pubkey
+    position: Pubkey
+    owner: Pubkey
     feeX: int
     feeY: int
 
 
-@dataclass
+@event_dataclass
 class LbPairCreateEvent(DLMMEvent):
-    lbPair: str
+    lbPair: Pubkey
     binStep: int
-    tokenX: str
-    tokenY: str
+    tokenX: Pubkey
+    tokenY: Pubkey
 
 
-@dataclass
+@event_dataclass
 class PositionCreateEvent(DLMMEvent):
-    lbPair: str
-    position: str
-    owner: str
+    lbPair: Pubkey
+    position: Pubkey
+    owner: Pubkey
 
 
-@dataclass
+@event_dataclass
 class FeeParameterUpdateEvent(DLMMEvent):
-    lbPair: str
+    lbPair: Pubkey
     protocolShare: int
     baseFactor: int
 
 
-@dataclass
+@event_dataclass
 class IncreaseObservationEvent(DLMMEvent):
-    oracle: str
+    oracle: Pubkey
     newObservationLength: int
 
 
-@dataclass
+@event_dataclass
 class WithdrawIneligibleRewardEvent(DLMMEvent):
-    lbPair: str
-    rewardMint: str
+    lbPair: Pubkey
+    rewardMint: Pubkey
     amount: int
 
 
-@dataclass
+@event_dataclass
 class UpdatePositionOperatorEvent(DLMMEvent):
-    position: str
-    oldOperator: str
-    newOperator: str
+    position: Pubkey
+    oldOperator: Pubkey
+    newOperator: Pubkey
 
 
-@dataclass
+@event_dataclass
 class UpdatePositionLockReleaseSlotEvent(DLMMEvent):
-    position: str
+    position: Pubkey
     currentSlot: int
     newLockReleaseSlot: int
     oldLockReleaseSlot: int
-    sender: str
+    sender: Pubkey
 
 
-@dataclass
+@event_dataclass
 class GoToABinEvent(DLMMEvent):
-    lbPair: str
+    lbPair: Pubkey
     fromBinId: int
     toBinId: int
 
@@ -345,66 +387,109 @@ def get_discriminator(event_name):
     return hashlib.sha256(discriminator_input).digest()[:8]
 
 
-T = TypeVar('T', bound=DLMMEvent)
-
-
-def create_event_instance(event_class: Type[T],
-                          block_time: int, tx: str,
-                          decoded_event: Dict[str, Any]) -> T:
-    field_mapping = {}
-    for field_info in fields(event_class):
-        field_name = field_info.name
-        if field_name in ['block_time', 'tx']:
-            continue
-        field_mapping[field_name] = field_name
-
-    constructor_args = {field_mapping.get(k, k): v for k, v in decoded_event.items()}
-
-    missing_fields = set(field_mapping.values()) - set(constructor_args.keys())
-    if missing_fields:
-        raise ValueError(f"Missing fields for {event_class.__name__}: {missing_fields}")
-
-    event_instance = event_class(block_time=block_time, tx=tx, **constructor_args)
-    return event_instance
+def get_field_offset(structure: Struct, field_name: str) -> Optional[int]:
+    offset = 0
+    for subcon in structure.subcons:
+        if subcon.name == field_name:
+            return offset
+        offset += subcon.sizeof()
+    return None
+
+
+class EventLayout:
+    """
+    Decoder of one event body, compiled once from its construct definition into a single struct.Struct
+    and a per field conversion plan, so decoding is one unpack_from call and a positional constructor call.
+    """
+    __slots__ = ('event_class', 'codec', 'plan')
+
+    def __init__(self, structure: Struct, event_class: Type[DLMMEvent]):
+        self.event_class = event_class
+        # skip block_time and tx, and the keyword only slot
+        field_names = [field_info.name for field_info in fields(event_class) if not field_info.kw_only][2:]
+        if field_names != [subcon.name for subcon in structure.subcons]:
+            raise ValueError(f"Fields of {event_class.__name__} do not match the event layout")
+
+        fmt = '<'
+        index = 0
+        self.plan: List[Tuple[int, int, Optional[Callable[[Any], Any]]]] = []  # (value index, count, converter)
+        for subcon in structure.subcons:
+            code, count, converter = self._compile_field(subcon.subcon)
+            fmt += code
+            self.plan.append((index, count, converter))
+            index += count
+        self.codec = struct.Struct(fmt)
+
+    @staticmethod
+    def _compile_field(field) -> Tuple[str, int, Optional[Callable[[Any], Any]]]:
+        if isinstance(field, FormatField):
+            return field.fmtstr[1:], 1, None
+        if field is Flag:
+            return '?', 1, None
+        if isinstance(field, Bytes):
+            return f"{field.length}s", 1, None if field.length == 32 else bytes.decode  # pubkeys stay raw
+        if isinstance(field, BytesInteger):
+            byteorder = 'little' if field.swapped else 'big'
+            return f"{field.length}s", 1, lambda value: int.from_bytes(value, byteorder, signed=field.signed)
+        if isinstance(field, Array) and isinstance(field.subcon, FormatField):
+            return f"{field.count}{field.subcon.fmtstr[1:]}", field.count, list
+        raise ValueError(f"Unsupported event field type {field}")
+
+    def decode(self, event_body: bytes, block_time: int, tx: str, slot: int = 0) -> DLMMEvent:
+        values = self.codec.unpack_from(event_body)
+        args = []
+        for index, count, converter in self.plan:
+            value = values[index] if count == 1 else values[index:index + count]
+            args.append(converter(value) if converter is not None else value)
+        return self.event_class(block_time, tx, *args, slot=slot)
 
 
 class EventDecoder:
     event_discriminators = {get_discriminator(event.value): event for event in event_structures.keys()}
+    event_layouts = {get_discriminator(event.value): EventLayout(structure, event_dataclasses[event])
+                     for event, structure in event_structures.items()}
+    class_discriminators = {event_dataclasses[event]: discriminator
+                            for discriminator, event in event_discriminators.items()}
+    # discriminator -> offset of the owner pubkey inside the event body, for events that have an owner
+    owner_offsets = {get_discriminator(event.value): offset for event, offset in
+                     ((event, get_field_offset(structure, 'owner')) for event, structure in event_structures.items())
+                     if offset is not None}
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def get_discriminators(event_classes: Tuple[Type[DLMMEvent], ...]) -> FrozenSet[bytes]:
+        return frozenset(EventDecoder.class_discriminators[event_class] for event_class in event_classes)
+
+    @classmethod
+    def is_relevant(cls, event_data: bytes, discriminators: Optional[FrozenSet[bytes]] = None,
+                    owners: Optional[Set[bytes]] = None) -> bool:
+        """
+        Check the discriminator and the raw owner pubkey of an encoded event without decoding it.
+        With owners given, events without an owner field are never relevant.
+        """
+        if discriminators is not None and bytes(event_data[:8]) not in discriminators:
+            return False
+        if owners is not None:
+            owner = cls.get_owner(event_data)
+            return owner is not None and owner in owners
+        return True
+
+    @classmethod
+    def get_owner(cls, event_data: bytes) -> Optional[bytes]:
+        """Get the raw owner pubkey of an encoded event without decoding it, None for events without an owner"""
+        offset = cls.owner_offsets.get(bytes(event_data[:8]))
+        if offset is None or len(event_data) < 8 + offset + 32:
+            return None
+        return bytes(event_data[8 + offset:8 + offset + 32])
 
     @classmethod
-    def decode_event(cls, event_data, block_time: int, tx: str) -> DLMMEvent:
+    def decode_event(cls, event_data, block_time: int, tx: str, slot: int = 0) -> DLMMEvent:
         if len(event_data) < 8:
             raise ValueError("Event data is too short to contain a discriminator.")
 
-        discriminator = event_data[:8]
-        event_type = cls.event_discriminators.get(discriminator)
-        if not event_type:
+        discriminator = bytes(event_data[:8])
+        layout = cls.event_layouts.get(discriminator)
+        if layout is None:
             raise ValueError(f"Unknown event discriminator: {discriminator.hex()}")
 
-        event_body = event_data[8:]
-        structure = event_structures[event_type]
-        parsed_event = structure.parse(event_body)
-
-        decoded_event = {}
-        for field, value in parsed_event.items():
-            if field == '_io':
-                continue
-            if isinstance(value, bytes) and len(value) == 32:
-                decoded_event[field] = base58.b58encode(value).decode('utf-8')
-            elif isinstance(value, list):
-                decoded_event[field] = [int(v) for v in value]
-            elif isinstance(value, bytes):
-                decoded_event[field] = value.decode('utf-8')
-            elif isinstance(value, int):
-                decoded_event[field] = int(value)
-            elif isinstance(value, bool):
-                decoded_event[field] = bool(value)
-            else:
-                decoded_event[field] = value
-
-        event_class = event_dataclasses.get(event_type)
-        if event_class is None:
-            raise ValueError(f"No data class defined for event type {event_type}")
-        event_instance = create_event_instance(event_class, block_time, tx, decoded_event)
-
-        return event_instance
+        return layout.decode(memoryview(event_data)[8:], block_time, tx, slot)
@@ -20,6 +20,7 @@ def parse_dlmm_events(transaction: EncodedConfirmedTransactionWithStatusMeta) ->
                 event_data = ix_data[8:]
 
                 events.append(EventDecoder.decode_event(event_data, transaction.block_time,
-                                                        str(transaction.transaction.transaction.signatures[0])))
+                                                        str(transaction.transaction.transaction.signatures[0]),
+                                                        transaction.slot))
 
     return events
@@ -0,0 +1,122 @@
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Iterable, Sequence, Tuple, Callable, List
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solders.pubkey import Pubkey
+
+from config.constants import LPCONNECT
+from libs.solana.rpc_pool import PooledAsyncClient
+
+logger = logging.getLogger(LPCONNECT)
+
+
+@dataclass(slots=True)
+class CachedAccount:
+    slot: int  # context slot the account was read at, or the slot it was touched at for invalidated entries
+    data: Optional[bytes]  # raw account data, None once invalidated
+    decoded: Dict[Callable[[bytes], Any], Any] = field(default_factory=dict)  # decoder -> decoded account
+
+
+class AccountCache:
+    """
+    LRU cache of program accounts, tagged with the slot they were read at.
+    The raw account data is cached along with its decoded value per decoder, so a read always gets
+    the account decoded by the decoder it passes.
+
+    A read states the slot it needs the account to be at least as recent as, and is served from the cache
+    when the cached slot satisfies it. Transactions seen in webhooks invalidate the accounts they touch:
+    the entry is kept as a tombstone at the touching slot, so only a read at that slot or later replaces it.
+    """
+
+    def __init__(self, maxsize: int = 500):
+        self.maxsize = maxsize
+        self.entries: OrderedDict[str, CachedAccount] = OrderedDict()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "invalidated": 0,
+            "evicted": 0
+        }
+
+    def get(self, pubkey: str, decode: Callable[[bytes], Any], min_slot: int = 0) -> Optional[Any]:
+        """Get the account decoded by decode if it was read at min_slot or later and was not touched since."""
+        entry = self.entries.get(pubkey)
+        if entry is None or entry.data is None or entry.slot < min_slot:
+            self.stats["misses"] += 1
+            return None
+        self.entries.move_to_end(pubkey)
+        self.stats["hits"] += 1
+        value = entry.decoded.get(decode)
+        if value is None:
+            value = entry.decoded[decode] = decode(entry.data)
+        return value
+
+    def put(self, pubkey: str, slot: int, data: bytes, decode: Callable[[bytes], Any], value: Any) -> None:
+        """Cache an account read at slot and its decoded value, unless a more recent read or touch is known."""
+        entry = self.entries.get(pubkey)
+        if entry is not None and entry.slot > slot:
+            return
+        if entry is None or entry.slot < slot or entry.data is None:
+            entry = CachedAccount(slot, data)
+        entry.decoded[decode] = value
+        self.entries[pubkey] = entry
+        self.entries.move_to_end(pubkey)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def invalidate(self, pubkeys: Iterable[str], slot: int) -> None:
+        """Mark cached accounts touched by a transaction at slot as stale."""
+        for pubkey in pubkeys:
+            entry = self.entries.get(pubkey)
+            if entry is not None and entry.slot <= slot:
+                entry.slot = slot
+                entry.data = None
+                entry.decoded.clear()
+                self.stats["invalidated"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss/invalidation counters."""
+        return {
+            **self.stats,
+            "size": len(self.entries),
+            "maxsize": self.maxsize
+        }
+
+
+_account_cache = AccountCache()
+
+
+def get_account_cache() -> AccountCache:
+    """Get the process wide account cache"""
+    return _account_cache
+
+
+async def get_decoded_accounts(client: AsyncClient,
+                               accounts: Sequence[Tuple[Pubkey, Callable[[bytes], Any]]],
+                               min_slot: int = 0,
+                               commitment: Optional[Commitment] = None) -> List[Any]:
+    """
+    Get decoded accounts, given as (pubkey, decoder) pairs, from the account cache.
+    Accounts that are not cached at min_slot or later are fetched in a single getMultipleAccounts call,
+    with min_slot as minimum context slot when the client supports it.
+    """
+    cache = get_account_cache()
+    values = [cache.get(str(pubkey), decode, min_slot) for pubkey, decode in accounts]
+    missing = [index for index, value in enumerate(values) if value is None]
+    if missing:
+        pubkeys = [accounts[index][0] for index in missing]
+        if min_slot and isinstance(client, PooledAsyncClient):
+            response = await client.get_multiple_accounts_at(pubkeys, min_slot, commitment=commitment)
+        else:
+            response = await client.get_multiple_accounts(pubkeys, commitment=commitment)
+        for index, account in zip(missing, response.value):
+            pubkey, decode = accounts[index]
+            if account is None:
+                raise ValueError(f"Account not found: {pubkey}")
+            values[index] = decode(account.data)
+            cache.put(str(pubkey), response.context.slot, account.data, decode, values[index])
+    return values
@@ -1,26 +1,54 @@
 import asyncio
 import sys
-from typing import List
+from typing import List, Optional, Iterable, AsyncIterator, Tuple, Dict
 
+import httpx
+
+from solana.rpc.commitment import Commitment
 from solders.pubkey import Pubkey
+from solders.signature import Signature
 from solders.transaction_status import EncodedConfirmedTransactionWithStatusMeta
 
+from libs.solana.rpc_pool import PooledAsyncClient
+
+DEFAULT_WINDOW = 32
+MAX_TRANSACTION_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
 
-async def get_all_signatures(client, account_address):
+
+async def get_all_signatures(client, account_address, commitment: Optional[Commitment] = None,
+                             until: Optional[str] = None, min_context_slot: Optional[int] = None):
+    """
+    Get the signatures of an account newest first, only those newer than until when given.
+    With min_context_slot, they are listed once the RPC node reached that slot, when the client supports it.
+    """
     pubkey = Pubkey.from_string(account_address)
+    until_signature = Signature.from_string(until) if until is not None else None
     all_signatures = []
     before = None
 
     while True:
         try:
-            response = await client.get_signatures_for_address(
-                pubkey,
-                limit=1000,  # Maximum allowed by the API
-                before=before
-            )
+            if min_context_slot and isinstance(client, PooledAsyncClient):
+                response = await client.get_signatures_for_address_at(
+                    pubkey,
+                    min_context_slot,
+                    limit=1000,
+                    before=before,
+                    until=until_signature,
+                    commitment=commitment
+                )
+            else:
+                response = await client.get_signatures_for_address(
+                    pubkey,
+                    limit=1000,  # Maximum allowed by the API
+                    before=before,
+                    until=until_signature,
+                    commitment=commitment
+                )
             signatures = response.value
             if not signatures:
-                if before is None:
+                if before is None and until is None:
                     sys.stderr.write("Wasn't able to fetch any signatures")
                 break
             all_signatures.extend(signatures)
@@ -32,21 +60,88 @@ async def get_all_signatures(client, account_address):
     return all_signatures
 
 
-async def get_transactions_batch(client, signatures, batch_size=100) -> List[EncodedConfirmedTransactionWithStatusMeta]:
-    transactions = []
-    for i in range(0, len(signatures), batch_size):
-        batch = signatures[i:i + batch_size]
-        tasks = [client.get_transaction(sig.signature) for sig in batch]
-        batch_transactions = await asyncio.gather(*tasks, return_exceptions=True)
-        for sig, tx_response in zip(batch, batch_transactions):
-            if isinstance(tx_response, Exception):
-                sys.stderr.write(f"Transaction {sig.signature} failed with error: {tx_response}")
-                continue  # Skip this transaction
-            if tx_response.value:
-                transactions.append(tx_response.value)
-    return transactions
-
-
-async def get_all_transactions(client, account_address) -> List[EncodedConfirmedTransactionWithStatusMeta]:
-    signatures = await get_all_signatures(client, account_address)
-    return await get_transactions_batch(client, signatures)
+def _is_throttling_error(error: BaseException) -> bool:
+    """Whether a failed request means the endpoint is overloaded: rate limited (after the client retries) or timed out"""
+    for cause in (error, error.__cause__):
+        if isinstance(cause, httpx.TimeoutException):
+            return True
+        if isinstance(cause, httpx.HTTPStatusError) and cause.response.status_code == httpx.codes.TOO_MANY_REQUESTS:
+            return True
+    return False
+
+
+async def stream_transactions(client, signatures: Iterable[Signature], window: int = DEFAULT_WINDOW,
+                              ordered: bool = True, commitment: Optional[Commitment] = None,
+                              max_retries: int = MAX_TRANSACTION_RETRIES
+                              ) -> AsyncIterator[Tuple[Signature, Optional[EncodedConfirmedTransactionWithStatusMeta]]]:
+    """
+    Fetch transactions with a sliding window of in-flight requests, yielding (signature, transaction) pairs
+    as they complete, in signature order when ordered, otherwise in completion order.
+
+    The window shrinks by half whenever the endpoint rate limits or times out and grows back by one request
+    per window of successful requests, up to window. Each signature is retried with backoff up to max_retries
+    times; transaction is None when it was not found or kept failing. Only the window is held in memory.
+    """
+    limit = float(window)  # adaptive number of requests in flight, at most window
+
+    async def fetch(signature: Signature) -> Optional[EncodedConfirmedTransactionWithStatusMeta]:
+        nonlocal limit
+        for attempt in range(max_retries + 1):
+            try:
+                response = await client.get_transaction(signature, commitment=commitment)
+                limit = min(window, limit + 1 / limit)
+                return response.value
+            except Exception as e:
+                if _is_throttling_error(e):
+                    limit = max(1.0, limit / 2)
+                if attempt == max_retries:
+                    sys.stderr.write(f"Transaction {signature} failed with error: {e}")
+                    return None
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+    signatures = iter(signatures)
+    exhausted = False
+    next_index = 0
+    next_yield = 0
+    in_flight: Dict[asyncio.Task, Tuple[int, Signature]] = {}
+    completed: Dict[int, Tuple[Signature, Optional[EncodedConfirmedTransactionWithStatusMeta]]] = {}
+    try:
+        while True:
+            # Completed but not yet yielded transactions count against the window, so memory stays bounded
+            while not exhausted and len(in_flight) + len(completed) < int(limit):
+                signature = next(signatures, None)
+                if signature is None:
+                    exhausted = True
+                    break
+                in_flight[asyncio.create_task(fetch(signature))] = (next_index, signature)
+                next_index += 1
+            if not in_flight:
+                break
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, signature = in_flight.pop(task)
+                completed[index] = (signature, task.result())
+            if ordered:
+                while next_yield in completed:
+                    yield completed.pop(next_yield)
+                    next_yield += 1
+            else:
+                while completed:
+                    yield completed.pop(next(iter(completed)))
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+async def get_transactions_batch(client, signatures, window: int = DEFAULT_WINDOW,
+                                 commitment: Optional[Commitment] = None) -> List[EncodedConfirmedTransactionWithStatusMeta]:
+    """Fetch the transactions of signature infos in order, skipping those that could not be fetched"""
+    return [transaction async for _, transaction in stream_transactions(client, (sig.signature for sig in signatures),
+                                                                         window, commitment=commitment)
+            if transaction]
+
+
+async def get_all_transactions(client, account_address,
+                               commitment: Optional[Commitment] = None) -> List[EncodedConfirmedTransactionWithStatusMeta]:
+    signatures = await get_all_signatures(client, account_address, commitment=commitment)
+    return await get_transactions_batch(client, signatures, commitment=commitment)
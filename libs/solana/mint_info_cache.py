@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Self
+
+from config.constants import LPCONNECT
+from libs.utils.base_storage import BaseStorage, StorageConfig, StorageError, MsgPackable
+
+logger = logging.getLogger(LPCONNECT)
+
+DEFAULT_METADATA_TTL_SECONDS = 7 * 24 * 3600
+
+
+@dataclass(slots=True)
+class MintInfo:
+    decimals: Optional[int] = None
+    metadata: Optional[Dict[str, str]] = None  # TokenMetadata fields, None when the mint has no metadata
+    metadata_fetched_at: Optional[float] = None  # None when metadata was never fetched
+
+    def to_dict(self) -> dict:
+        return {
+            'decimals': self.decimals,
+            'metadata': self.metadata,
+            'metadata_fetched_at': self.metadata_fetched_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Self:
+        return cls(
+            decimals=data.get('decimals'),
+            metadata=data.get('metadata'),
+            metadata_fetched_at=data.get('metadata_fetched_at')
+        )
+
+
+@dataclass
+class StorageState(MsgPackable):
+    """State container implementing MsgPackable protocol"""
+    VERSION: int = 1
+
+    version: int = VERSION
+    mints: OrderedDict[str, MintInfo] = field(default_factory=OrderedDict)  # mint -> MintInfo, in LRU order
+
+    def to_msgpack(self) -> dict:
+        """Serialize to msgpack format"""
+        return {
+            'version': self.version,
+            'mints': [[mint, info.to_dict()] for mint, info in self.mints.items()]
+        }
+
+    @classmethod
+    def from_msgpack(cls, data: dict) -> Self:
+        try:
+            state = cls()
+            state.version = data.get('version', cls.VERSION)
+            for mint, info in data.get('mints', []):
+                state.mints[mint] = MintInfo.from_dict(info)
+            return state
+
+        except Exception as e:
+            raise StorageError(f"Failed to deserialize storage state: {e}")
+
+
+class MintInfoCache(BaseStorage[StorageState]):
+    """
+    LRU cache of immutable mint data: decimals, which never change, and token metadata,
+    which is refetched after metadata_ttl_seconds (never when the TTL is None).
+    When persisted, the cache is loaded at startup so known mints are never fetched again.
+    """
+
+    def __init__(self, file_path: str | Path,
+                 maxsize: int = 10000,
+                 metadata_ttl_seconds: Optional[float] = DEFAULT_METADATA_TTL_SECONDS,
+                 persist: bool = True,
+                 save_interval: float = 5.0,
+                 batch_size: int = 100,
+                 **kwargs):
+        config = StorageConfig(
+            file_path=Path(file_path),
+            save_interval=save_interval,
+            batch_size=batch_size,
+            **kwargs
+        )
+        super().__init__(config)
+        self.maxsize = maxsize
+        self.metadata_ttl = metadata_ttl_seconds
+        self.persist = persist
+        self.state = self.create_empty_state()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evicted": 0
+        }
+
+    def create_empty_state(self) -> StorageState:
+        """Create an empty storage state"""
+        return StorageState()
+
+    def state_from_msgpack(self, data: dict) -> StorageState:
+        """Create state from msgpack data"""
+        return StorageState.from_msgpack(data)
+
+    async def initialize(self) -> None:
+        """Load cached mints if persistence is enabled"""
+        if not self.persist:
+            return
+        await super().initialize()
+        logger.info(f"Loaded {len(self.state.mints)} cached mints")
+
+    async def close(self) -> None:
+        """Flush the cache if persistence is enabled"""
+        if self.persist:
+            await super().close()
+
+    def _mark_cache_modified(self) -> None:
+        """Schedule a save, in-memory only caches are never written"""
+        if self.persist:
+            self._mark_modified()
+
+    def _get(self, mint: str) -> Optional[MintInfo]:
+        info = self.state.mints.get(mint)
+        if info is not None:
+            self.state.mints.move_to_end(mint)
+        return info
+
+    def _get_or_create(self, mint: str) -> MintInfo:
+        info = self._get(mint)
+        if info is None:
+            info = self.state.mints[mint] = MintInfo()
+            while len(self.state.mints) > self.maxsize:
+                self.state.mints.popitem(last=False)
+                self.stats["evicted"] += 1
+        return info
+
+    def _record(self, hit: bool) -> None:
+        self.stats["hits" if hit else "misses"] += 1
+
+    async def get_decimals(self, mint: str) -> Optional[int]:
+        """Get cached decimals of a mint, None if unknown"""
+        info = self._get(mint)
+        decimals = info.decimals if info is not None else None
+        self._record(decimals is not None)
+        return decimals
+
+    async def set_decimals(self, mint: str, decimals: int) -> None:
+        self._get_or_create(mint).decimals = decimals
+        self._mark_cache_modified()
+
+    async def get_metadata(self, mint: str) -> Tuple[bool, Optional[Dict[str, str]]]:
+        """Get (found, metadata) of a mint, stale metadata is reported as not found so it gets refreshed"""
+        info = self._get(mint)
+        found = (info is not None and info.metadata_fetched_at is not None and
+                 (self.metadata_ttl is None or time.time() - info.metadata_fetched_at <= self.metadata_ttl))
+        self._record(found)
+        return found, info.metadata if found else None
+
+    async def set_metadata(self, mint: str, metadata: Optional[Dict[str, str]]) -> None:
+        info = self._get_or_create(mint)
+        info.metadata = metadata
+        info.metadata_fetched_at = time.time()
+        self._mark_cache_modified()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss/eviction counters."""
+        return {
+            **self.stats,
+            "size": len(self.state.mints),
+            "maxsize": self.maxsize
+        }
+
+
+_mint_info_cache = MintInfoCache('mint_info.msgpack', persist=False)
+
+
+def get_mint_info_cache() -> MintInfoCache:
+    """Get the process wide mint cache, an in-memory one unless another was set"""
+    return _mint_info_cache
+
+
+def set_mint_info_cache(cache: MintInfoCache) -> None:
+    global _mint_info_cache
+    _mint_info_cache = cache
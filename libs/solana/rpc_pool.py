@@ -0,0 +1,357 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Optional, Any, Tuple, List, Set, Type, TypeVar
+
+import httpx
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solana.rpc.core import RPCException
+from solana.rpc.providers.async_http import AsyncHTTPProvider
+from solana.rpc.providers.core import DEFAULT_TIMEOUT, _after_request_unparsed
+from solders.account_decoder import UiAccountEncoding
+from solders.commitment_config import CommitmentLevel
+from solders.pubkey import Pubkey
+from solders.rpc.config import RpcAccountInfoConfig, RpcSignaturesForAddressConfig
+from solders.rpc.errors import MinContextSlotNotReachedMessage
+from solders.rpc.requests import Body, GetAccountInfo, GetMultipleAccounts, GetSignaturesForAddress
+from solders.rpc.responses import GetAccountInfoResp, GetMultipleAccountsResp, GetSignaturesForAddressResp
+from solders.signature import Signature
+
+from config.constants import LPCONNECT
+from libs.solana.slot_tracker import SlotTracker
+
+logger = logging.getLogger(LPCONNECT)
+
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+DEFAULT_MAX_BATCH_SIZE = 20
+DEFAULT_BATCH_WINDOW_SECONDS = 0.005
+MAX_RATE_LIMITED_RETRIES = 3
+DEFAULT_RATE_LIMITED_BACKOFF_SECONDS = 1.0
+DEFAULT_MIN_CONTEXT_SLOT_TIMEOUT_SECONDS = 60.0
+MAX_MIN_CONTEXT_SLOT_ATTEMPTS = 3
+
+RespT = TypeVar('RespT')
+
+_clients: Dict[str, 'PooledAsyncClient'] = {}
+
+
+class SlotNotReachedError(Exception):
+    """The RPC node did not reach a required minimum context slot in time"""
+    pass
+
+
+class RateLimiter:
+    """Token bucket limiting the request rate to an endpoint, a non-positive rate disables it"""
+
+    def __init__(self, requests_per_second: float, burst: Optional[int] = None):
+        self.rate = requests_per_second
+        self.capacity = burst or max(1, int(requests_per_second))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def block(self, seconds: float) -> None:
+        """Stop sending requests for a while, after the endpoint answered 429."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+
+class PooledHTTPProvider(AsyncHTTPProvider):
+    """
+    HTTP provider over a sized connection pool.
+
+    Identical requests (same method and params, which include the commitment) that are in flight at the same
+    time are sent once and every caller gets the same response. Distinct requests issued within batch_window
+    seconds of each other are sent together as one JSON-RPC batch of up to max_batch_size requests
+    (max_batch_size of 1 disables batching). Requests are rate limited per HTTP request to the endpoint and
+    retried after the advertised delay when the endpoint answers 429.
+    """
+
+    def __init__(self, endpoint: str,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 batch_window: float = DEFAULT_BATCH_WINDOW_SECONDS):
+        # Skip AsyncHTTPProvider.__init__, it would open a session of its own
+        super(AsyncHTTPProvider, self).__init__(endpoint, timeout=timeout)
+        self.session = httpx.AsyncClient(timeout=timeout,
+                                         limits=httpx.Limits(max_connections=max_connections,
+                                                             max_keepalive_connections=max_connections))
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.max_batch_size = max_batch_size
+        self.batch_window = batch_window
+        self.batch: List[Tuple[dict, asyncio.Future]] = []  # (request, future) waiting for the batch to be sent
+        self.batch_timer: Optional[asyncio.TimerHandle] = None
+        self.batch_tasks: Set[asyncio.Task] = set()
+        self.stats = {
+            "requests": 0,
+            "coalesced": 0,
+            "rate_limited": 0,
+            "batches": 0,
+            "batched_requests": 0,
+            "batch_resent": 0
+        }
+
+    @staticmethod
+    def _request_key(body: Body) -> str:
+        request = json.loads(body.to_json())
+        return json.dumps([request['method'], request.get('params')], sort_keys=True)
+
+    async def make_request_unparsed(self, body: Body) -> str:
+        """Send the request, or wait for an identical one that is already in flight."""
+        key = self._request_key(body)
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._submit(body))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self._on_request_done(key, done))
+        else:
+            self.stats["coalesced"] += 1
+        # A cancelled caller must not cancel the request for the other callers
+        return await asyncio.shield(task)
+
+    def _on_request_done(self, key: str, task: asyncio.Task) -> None:
+        self.in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved by the callers, even if all of them were cancelled
+
+    async def _submit(self, body: Body) -> str:
+        """Send the request on its own, or add it to the next batch."""
+        if self.max_batch_size <= 1:
+            return await self._send(self._before_request(body=body))
+        future = asyncio.get_running_loop().create_future()
+        self.batch.append((json.loads(body.to_json()), future))
+        if len(self.batch) >= self.max_batch_size:
+            self._flush_batch()
+        elif self.batch_timer is None:
+            self.batch_timer = asyncio.get_running_loop().call_later(self.batch_window, self._flush_batch)
+        return await future
+
+    def _flush_batch(self) -> None:
+        if self.batch_timer is not None:
+            self.batch_timer.cancel()
+            self.batch_timer = None
+        batch, self.batch = self.batch, []
+        if batch:
+            task = asyncio.create_task(self._send_batch(batch))
+            self.batch_tasks.add(task)
+            task.add_done_callback(self.batch_tasks.discard)
+
+    async def _send_batch(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        """Send the requests as one JSON-RPC batch and hand every caller its own response."""
+        raw_responses: List[Optional[str]] = [None] * len(batch)
+        if len(batch) > 1:
+            # Requests of a batch are told apart by id, callers all build theirs with the same default id
+            content = json.dumps([{**request, "id": index} for index, (request, _) in enumerate(batch)])
+            try:
+                raw = await self._send({**self._build_common_request_kwargs(), "content": content})
+                self.stats["batches"] += 1
+                self.stats["batched_requests"] += len(batch)
+                split = self._split_batch_response(raw, batch)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == httpx.codes.TOO_MANY_REQUESTS or e.response.is_server_error:
+                    self._fail_batch(batch, e)
+                    return
+                split = None
+            except Exception as e:
+                self._fail_batch(batch, e)
+                return
+            if split is None:
+                self._disable_batching()
+            else:
+                raw_responses = split
+
+        # Requests left without a response, or all of them when the batch was rejected, are sent on their own
+        missing = [index for index, raw_response in enumerate(raw_responses) if raw_response is None]
+        if len(batch) > 1:
+            self.stats["batch_resent"] += len(missing)
+        sent = await asyncio.gather(*(self._send({**self._build_common_request_kwargs(),
+                                                  "content": json.dumps(batch[index][0])}) for index in missing),
+                                    return_exceptions=True)
+        for index, raw_response in zip(missing, sent):
+            raw_responses[index] = raw_response
+
+        for (_, future), raw_response in zip(batch, raw_responses):
+            if future.done():
+                continue
+            if isinstance(raw_response, BaseException):
+                future.set_exception(raw_response)
+            else:
+                future.set_result(raw_response)
+
+    @staticmethod
+    def _fail_batch(batch: List[Tuple[dict, asyncio.Future]], error: Exception) -> None:
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _disable_batching(self) -> None:
+        """Send requests one by one from now on, the endpoint does not take batches"""
+        if self.max_batch_size > 1:
+            logger.warning(f"{self.endpoint_uri} rejected a batch request, batching is disabled")
+            self.max_batch_size = 1
+
+    @staticmethod
+    def _split_batch_response(raw: str, batch: List[Tuple[dict, asyncio.Future]]) -> Optional[List[Optional[str]]]:
+        """Match batch responses back to requests by id, None when the batch was rejected as a whole."""
+        try:
+            responses = json.loads(raw)
+        except ValueError:
+            return None
+        if not isinstance(responses, list):
+            # The endpoint rejected the batch as a whole, e.g. batches are not supported by the plan
+            return None
+        by_id = {response.get("id"): response for response in responses if isinstance(response, dict)}
+        raw_responses = []
+        for index, (request, _) in enumerate(batch):
+            response = by_id.get(index)
+            raw_responses.append(None if response is None else json.dumps({**response, "id": request.get("id", 0)}))
+        return raw_responses
+
+    async def make_batch_request_unparsed(self, reqs: Tuple[Body, ...]) -> str:
+        """Send a batch request, rate limited as a single request."""
+        return await self._send(self._before_batch_request(reqs))
+
+    async def _send(self, request_kwargs: Dict[str, Any]) -> str:
+        for attempt in range(MAX_RATE_LIMITED_RETRIES + 1):
+            await self.rate_limiter.acquire()
+            self.stats["requests"] += 1
+            raw_response = await self.session.post(**request_kwargs)
+            if raw_response.status_code != httpx.codes.TOO_MANY_REQUESTS or attempt == MAX_RATE_LIMITED_RETRIES:
+                return _after_request_unparsed(raw_response)
+            self.stats["rate_limited"] += 1
+            retry_after = raw_response.headers.get('Retry-After')
+            backoff = float(retry_after) if retry_after and retry_after.isdigit() else \
+                DEFAULT_RATE_LIMITED_BACKOFF_SECONDS * 2 ** attempt
+            logger.warning(f"Rate limited by {self.endpoint_uri}, retrying in {backoff}s")
+            self.rate_limiter.block(backoff)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request, coalescing and rate limiting counters."""
+        return {
+            **self.stats,
+            "in_flight": len(self.in_flight),
+            "batch_pending": len(self.batch)
+        }
+
+
+class PooledAsyncClient(AsyncClient):
+    """
+    AsyncClient sending its requests through a PooledHTTPProvider.
+    Account reads can require a minimum context slot, they wait on the slot tracker until the node reached it
+    instead of polling with reads that would be rejected or stale.
+    """
+
+    def __init__(self, endpoint: str,
+                 max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 commitment: Optional[Commitment] = None,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE):
+        # Skip AsyncClient.__init__, it would open a provider session of its own
+        super(AsyncClient, self).__init__(commitment)
+        self._provider = PooledHTTPProvider(endpoint, max_connections, requests_per_second, timeout, max_batch_size)
+        self.slot_tracker = SlotTracker(self)
+
+    def _account_info_config(self, commitment: Optional[Commitment], min_context_slot: int) -> RpcAccountInfoConfig:
+        return RpcAccountInfoConfig(UiAccountEncoding.Base64,
+                                    commitment=CommitmentLevel.from_string(commitment or self._commitment),
+                                    min_context_slot=min_context_slot)
+
+    async def _make_request_at_slot(self, body: Body, parser: Type[RespT], min_context_slot: int,
+                                     timeout: float) -> RespT:
+        for _ in range(MAX_MIN_CONTEXT_SLOT_ATTEMPTS):
+            if not await self.slot_tracker.wait_for_slot(min_context_slot, timeout=timeout):
+                raise SlotNotReachedError(f"RPC node did not reach slot {min_context_slot} within {timeout}s")
+            try:
+                response = await self._provider.make_request(body, parser)
+            except RPCException as e:
+                error = e.args[0] if e.args else None
+                if not isinstance(error, MinContextSlotNotReachedMessage):
+                    raise
+                # The request was served by a node of the endpoint that is behind the observed slot
+                await asyncio.sleep(self.slot_tracker.poll_interval)
+                continue
+            if hasattr(response, 'context'):
+                self.slot_tracker.observe(response.context.slot)
+            return response
+        raise SlotNotReachedError(f"RPC node did not reach slot {min_context_slot}")
+
+    async def get_account_info_at(self, pubkey: Pubkey, min_context_slot: int,
+                                  commitment: Optional[Commitment] = None,
+                                  timeout: float = DEFAULT_MIN_CONTEXT_SLOT_TIMEOUT_SECONDS) -> GetAccountInfoResp:
+        """getAccountInfo read at min_context_slot or later"""
+        body = GetAccountInfo(pubkey, self._account_info_config(commitment, min_context_slot))
+        return await self._make_request_at_slot(body, GetAccountInfoResp, min_context_slot, timeout)
+
+    async def get_multiple_accounts_at(self, pubkeys: List[Pubkey], min_context_slot: int,
+                                       commitment: Optional[Commitment] = None,
+                                       timeout: float = DEFAULT_MIN_CONTEXT_SLOT_TIMEOUT_SECONDS
+                                       ) -> GetMultipleAccountsResp:
+        """getMultipleAccounts read at min_context_slot or later"""
+        body = GetMultipleAccounts(pubkeys, self._account_info_config(commitment, min_context_slot))
+        return await self._make_request_at_slot(body, GetMultipleAccountsResp, min_context_slot, timeout)
+
+    async def get_signatures_for_address_at(self, account: Pubkey, min_context_slot: int,
+                                            before: Optional[Signature] = None,
+                                            until: Optional[Signature] = None,
+                                            limit: Optional[int] = None,
+                                            commitment: Optional[Commitment] = None,
+                                            timeout: float = DEFAULT_MIN_CONTEXT_SLOT_TIMEOUT_SECONDS
+                                            ) -> GetSignaturesForAddressResp:
+        """getSignaturesForAddress listed at min_context_slot or later"""
+        config = RpcSignaturesForAddressConfig(before=before, until=until, limit=limit,
+                                               commitment=CommitmentLevel.from_string(commitment or self._commitment),
+                                               min_context_slot=min_context_slot)
+        body = GetSignaturesForAddress(account, config)
+        return await self._make_request_at_slot(body, GetSignaturesForAddressResp, min_context_slot, timeout)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._provider.get_stats(),
+            "observed_slot": self.slot_tracker.slot,
+            "slot_waiters": len(self.slot_tracker.waiters)
+        }
+
+
+def get_rpc_client(endpoint: str,
+                   max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                   requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                   max_batch_size: int = DEFAULT_MAX_BATCH_SIZE) -> PooledAsyncClient:
+    """Get the process wide client of an endpoint, pool settings only apply to the first call per endpoint."""
+    client = _clients.get(endpoint)
+    if client is None:
+        client = PooledAsyncClient(endpoint, max_connections, requests_per_second,
+                                   max_batch_size=max_batch_size)
+        _clients[endpoint] = client
+    return client
+
+
+async def close_rpc_clients() -> None:
+    """Close the connection pools of every shared client."""
+    while _clients:
+        _, client = _clients.popitem()
+        await client.close()
@@ -0,0 +1,72 @@
+import asyncio
+import heapq
+import logging
+from itertools import count
+from typing import List, Optional, Tuple
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment, Confirmed
+
+from config.constants import LPCONNECT
+
+logger = logging.getLogger(LPCONNECT)
+
+DEFAULT_POLL_INTERVAL_SECONDS = 0.4  # about one slot
+
+
+class SlotTracker:
+    """
+    Tracks the slot an RPC node has reached at a commitment, and wakes up waiters once it passes their slot.
+
+    Slots are learned from the context of responses (see observe) and, while anyone is waiting,
+    from a single getSlot poller shared by every waiter.
+    """
+
+    def __init__(self, client: AsyncClient,
+                 commitment: Commitment = Confirmed,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL_SECONDS):
+        self.client = client
+        self.commitment = commitment
+        self.poll_interval = poll_interval
+        self.slot = 0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []  # heap of (slot, seq, future)
+        self.polling_task: Optional[asyncio.Task] = None
+        self._sequence = count()
+
+    def observe(self, slot: int) -> None:
+        """Record that the node reached slot, and wake up every waiter it satisfies."""
+        if slot <= self.slot:
+            return
+        self.slot = slot
+        while self.waiters and self.waiters[0][0] <= slot:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                future.set_result(None)
+
+    async def wait_for_slot(self, slot: int, timeout: Optional[float] = None) -> bool:
+        """Wait until the node reached slot, returns False on timeout."""
+        if slot <= self.slot:
+            return True
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (slot, next(self._sequence), future))
+        if self.polling_task is None or self.polling_task.done():
+            self.polling_task = asyncio.create_task(self._poll())
+        try:
+            await asyncio.wait_for(future, timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def _poll(self) -> None:
+        """Poll getSlot until nobody waits anymore."""
+        while True:
+            self.waiters = [waiter for waiter in self.waiters if not waiter[2].done()]
+            heapq.heapify(self.waiters)
+            if not self.waiters:
+                return
+            try:
+                self.observe((await self.client.get_slot(self.commitment)).value)
+            except Exception as e:
+                logger.warning(f"Failed to poll slot: {e}")
+            if self.waiters:
+                await asyncio.sleep(self.poll_interval)
@@ -1,12 +1,14 @@
 import asyncio
 import traceback
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 from typing import Optional
 
 from solana.rpc.async_api import AsyncClient
 from solana.rpc.commitment import Confirmed
 from solders.pubkey import Pubkey
 
+from libs.solana.mint_info_cache import get_mint_info_cache
+
 METADATA_PROGRAM_ID = Pubkey.from_string("metaqbxxUerdq28cj1RbAWkYQm3ybzjb6a8bt518x1s")
 
 
@@ -29,6 +31,11 @@ async def get_token_metadata(
         max_retries: int = 5,
         initial_delay: float = 1.0
 ) -> Optional[TokenMetadata]:
+    cache = get_mint_info_cache()
+    found, metadata = await cache.get_metadata(str(token_address))
+    if found:
+        return TokenMetadata(**metadata) if metadata is not None else None
+
     for retry in range(max_retries):
         try:
             metadata_account = Pubkey.find_program_address(
@@ -39,9 +46,12 @@ async def get_token_metadata(
             account_info = await client.get_account_info(metadata_account, commitment=Confirmed)
 
             if account_info.value is not None:
-                return decode_custom_metadata(account_info.value.data)
+                token_metadata = decode_custom_metadata(account_info.value.data)
+                await cache.set_metadata(str(token_address), asdict(token_metadata))
+                return token_metadata
             else:
                 print(f"No metadata found for token: {token_address}")
+                await cache.set_metadata(str(token_address), None)
                 return None
 
         except Exception as e:
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import hashlib
+import inspect
+import logging
+import pickle
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Self, Tuple
+
+from config.constants import LPCONNECT
+from libs.utils.base_storage import BaseStorage, StorageConfig, StorageError, MsgPackable
+
+logger = logging.getLogger(LPCONNECT)
+
+
+@lru_cache(maxsize=None)
+def _get_source_digest(render_fn: Callable) -> bytes:
+    """Digest of the module source of a render function, so images rendered by older code are not reused"""
+    try:
+        return hashlib.blake2b(inspect.getsource(inspect.getmodule(render_fn)).encode()).digest()
+    except (OSError, TypeError):
+        return b''
+
+
+def get_render_key(render_fn: Callable[..., bytes], args: Tuple[Any, ...]) -> str:
+    """Hash of a render function and its inputs, style parameters included"""
+    digest = hashlib.blake2b(_get_source_digest(render_fn), digest_size=20)
+    digest.update(f"{render_fn.__module__}.{render_fn.__qualname__}".encode())
+    digest.update(pickle.dumps(args, protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+
+@dataclass
+class StorageState(MsgPackable):
+    """State container implementing MsgPackable protocol"""
+    VERSION: int = 1
+
+    version: int = VERSION
+    images: OrderedDict[str, bytes] = field(default_factory=OrderedDict)  # render key -> PNG, LRU order
+
+    def to_msgpack(self) -> dict:
+        """Serialize to msgpack format"""
+        return {
+            'version': self.version,
+            'images': [[key, image] for key, image in self.images.items()]
+        }
+
+    @classmethod
+    def from_msgpack(cls, data: dict) -> Self:
+        try:
+            state = cls()
+            state.version = data.get('version', cls.VERSION)
+            for key, image in data.get('images', []):
+                state.images[key] = image
+            return state
+
+        except Exception as e:
+            raise StorageError(f"Failed to deserialize storage state: {e}")
+
+
+class RenderCache(BaseStorage[StorageState]):
+    """
+    Rendered images keyed by get_render_key, so the same table or chart is rendered once,
+    also across retries and restarts. The least recently used images are dropped beyond max_bytes.
+    """
+
+    def __init__(self, file_path: str | Path,
+                 max_bytes: int = 16 * 1024 * 1024,
+                 save_interval: float = 60.0,
+                 batch_size: int = 100,
+                 **kwargs):
+        config = StorageConfig(
+            file_path=Path(file_path),
+            save_interval=save_interval,
+            batch_size=batch_size,
+            **kwargs
+        )
+        super().__init__(config)
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "evicted": 0
+        }
+
+    def create_empty_state(self) -> StorageState:
+        """Create an empty storage state"""
+        return StorageState()
+
+    def state_from_msgpack(self, data: dict) -> StorageState:
+        """Create state from msgpack data"""
+        return StorageState.from_msgpack(data)
+
+    async def _load_state(self) -> None:
+        await super()._load_state()
+        self.total_bytes = sum(len(image) for image in self.state.images.values())
+        self._evict()
+
+    def _evict(self) -> None:
+        while self.total_bytes > self.max_bytes and self.state.images:
+            _, image = self.state.images.popitem(last=False)
+            self.total_bytes -= len(image)
+            self.stats["evicted"] += 1
+            self._modified = True
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Get a rendered image, None when it was not rendered yet or the cache is not loaded"""
+        image = self.state.images.get(key) if self.state else None
+        if image is None:
+            self.stats["misses"] += 1
+            return None
+        self.state.images.move_to_end(key)
+        self.stats["hits"] += 1
+        return image
+
+    def put(self, key: str, image: bytes) -> None:
+        """Cache a rendered image"""
+        if self.state is None or len(image) > self.max_bytes or key in self.state.images:
+            return
+        self.state.images[key] = image
+        self.total_bytes += len(image)
+        self._evict()
+        self._mark_modified()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters."""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(self.state.images) if self.state else 0,
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes
+        }
@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Any, Dict
+
+from config.constants import LPCONNECT
+from libs.utils.render_cache import RenderCache, get_render_key
+
+logger = logging.getLogger(LPCONNECT)
+
+DEFAULT_RENDER_WORKERS = 2
+DEFAULT_RENDER_TIMEOUT_SECONDS = 10.0
+DEFAULT_MAX_PENDING_PER_WORKER = 4
+
+
+def _init_worker() -> None:
+    """Load matplotlib with the Agg backend and its fonts once per worker process"""
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib import pyplot as plt
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.text(0, 0, '0')
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def _ready() -> bool:
+    return True
+
+
+class RenderPool:
+    """
+    Process pool rendering images off the event loop.
+
+    Render functions must be module level functions taking plain, picklable payloads (arrays, strings, numbers)
+    and returning the encoded image bytes. At most max_pending renders are queued or running, render returns None
+    when the pool is saturated, the render times out or fails, so callers can fall back to text only messages.
+    A render that times out keeps its slot until its worker is done with it, the worker process cannot be stopped.
+    With no workers, images are rendered inline on the event loop.
+    Rendered images are reused from the render cache, when one is given.
+    """
+
+    def __init__(self, workers: int = DEFAULT_RENDER_WORKERS,
+                 timeout: float = DEFAULT_RENDER_TIMEOUT_SECONDS,
+                 max_pending: Optional[int] = None,
+                 cache: Optional[RenderCache] = None):
+        self.workers = workers
+        self.cache = cache
+        self.timeout = timeout
+        self.max_pending = max_pending or max(1, workers) * DEFAULT_MAX_PENDING_PER_WORKER
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.pending = 0
+        self.stats = {
+            "rendered": 0,
+            "rejected": 0,
+            "timed_out": 0,
+            "abandoned": 0,  # timed out while running, the worker finished them for nothing
+            "failed": 0
+        }
+
+    async def start(self) -> None:
+        """Start the worker processes and wait until each one has loaded matplotlib"""
+        if self.workers <= 0 or self.executor is not None:
+            return
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                            initializer=_init_worker)
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, _ready) for _ in range(self.workers)))
+        logger.info(f"Started {self.workers} render workers")
+
+    async def close(self) -> None:
+        if self.executor is not None:
+            executor, self.executor = self.executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def render(self, render_fn: Callable[..., bytes], *args: Any) -> Optional[bytes]:
+        """Render an image, None when it could not be rendered in time"""
+        key = None
+        if self.cache is not None:
+            key = get_render_key(render_fn, args)
+            image = self.cache.get(key)
+            if image is not None:
+                return image
+        if self.pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            logger.warning(f"Render pool saturated, skipping {render_fn.__name__}")
+            return None
+        self.pending += 1
+        executor_future = None
+        try:
+            if self.executor is None:
+                image = render_fn(*args)
+            else:
+                # The slot is freed when the worker is done, not when the caller stops waiting
+                loop = asyncio.get_running_loop()
+                executor_future = self.executor.submit(render_fn, *args)
+                executor_future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+                image = await asyncio.wait_for(asyncio.wrap_future(executor_future), timeout=self.timeout)
+            self.stats["rendered"] += 1
+            if key is not None:
+                self.cache.put(key, image)
+            return image
+        except asyncio.TimeoutError:
+            self.stats["timed_out"] += 1
+            if not executor_future.done():
+                self.stats["abandoned"] += 1
+            logger.warning(f"Rendering {render_fn.__name__} timed out after {self.timeout}s")
+            return None
+        except Exception as e:
+            self.stats["failed"] += 1
+            logger.error(f"Rendering {render_fn.__name__} failed: {e}")
+            return None
+        finally:
+            if executor_future is None:
+                self.pending -= 1
+
+    def _release(self) -> None:
+        self.pending -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get render counters and the current load."""
+        return {
+            **self.stats,
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "cache": self.cache.get_stats() if self.cache is not None else {}
+        }
+
+
+_render_pool = RenderPool(workers=0)
+
+
+def get_render_pool() -> RenderPool:
+    """Get the process wide render pool, an inline one unless another was set"""
+    return _render_pool
+
+
+def set_render_pool(pool: RenderPool) -> None:
+    global _render_pool
+    _render_pool = pool
+
+
+async def close_render_pool() -> None:
+    """Stop the worker processes of the process wide render pool."""
+    await _render_pool.close()
@@ -2,12 +2,16 @@ import hashlib
 import logging
 import os
 import time
+from typing import List, Optional, Sequence
 
 from solana.rpc.async_api import AsyncClient
+from solana.rpc.commitment import Commitment
+from solders.account import Account
 from solders.pubkey import Pubkey
 from solders.token.state import Mint
 
 from config.constants import LPCONNECT
+from libs.solana.mint_info_cache import get_mint_info_cache
 
 
 async def get_mint_info(client: AsyncClient, mint_pubkey: Pubkey) -> Mint:
@@ -23,8 +27,30 @@ async def get_mint_info(client: AsyncClient, mint_pubkey: Pubkey) -> Mint:
 
 
 async def get_token_decimals(client: AsyncClient, mint_pubkey: Pubkey) -> int:
-    mint_info = await get_mint_info(client, mint_pubkey)
-    return mint_info.decimals
+    return (await get_tokens_decimals(client, [mint_pubkey]))[0]
+
+
+async def get_multiple_accounts_info(client: AsyncClient, pubkeys: Sequence[Pubkey],
+                                     commitment: Optional[Commitment] = None) -> List[Account]:
+    """Fetch accounts in a single getMultipleAccounts call, all of them are read at the same slot"""
+    response = await client.get_multiple_accounts(list(pubkeys), commitment=commitment)
+    missing = [str(pubkey) for pubkey, account in zip(pubkeys, response.value) if account is None]
+    if missing:
+        raise ValueError(f"Accounts not found: {', '.join(missing)}")
+    return response.value
+
+
+async def get_tokens_decimals(client: AsyncClient, mint_pubkeys: Sequence[Pubkey]) -> List[int]:
+    """Get decimals of mints from the mint cache, fetching unknown mints in a single call"""
+    cache = get_mint_info_cache()
+    decimals = {str(mint): await cache.get_decimals(str(mint)) for mint in mint_pubkeys}
+    missing = [mint for mint in mint_pubkeys if decimals[str(mint)] is None]
+    if missing:
+        accounts = await get_multiple_accounts_info(client, missing)
+        for mint, account in zip(missing, accounts):
+            decimals[str(mint)] = Mint.from_bytes(account.data).decimals
+            await cache.set_decimals(str(mint), decimals[str(mint)])
+    return [decimals[str(mint)] for mint in mint_pubkeys]
 
 
 def convert_value(value, token_decimal):